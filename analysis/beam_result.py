@@ -13,27 +13,73 @@
 # - Lungo l’asse della trave si usa la modalità "parametrica" (bpParam): BeamPos va da 0 (inizio)
 #   a 1 (fine). Non forniamo le posizioni a priori, le sceglie l’API in modo uniforme.
 #
+# - Con workers > 1 le travi vengono divise in blocchi contigui fra più sessioni API (uID 1..workers),
+#   ognuna con il modello aperto in sola lettura e buffer propri; le chiamate ctypes rilasciano
+#   il GIL, quindi le estrazioni si sovrappongono. Default 1 (seriale): la DLL non dichiara la thread-safety.
+#
 # Output della funzione max_check_value: massimo η su tutte le travi e stazioni.
 
 import os
+import re
+import math
 import ctypes as ct
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import St7API as st7
 
+try:                        # opzionale: kernel η compilato (pip install numba)
+    from numba import njit
+except ImportError:
+    njit = None
+
+# ----------------------------- Buffer di lavoro riusati ---------------------------------------
+# Un pool per thread: i worker di max_check_value (uID diversi) non condividono buffer.
+_POOL = threading.local()
+
+
+def _get_buf(name: str, ctype, size: int):
+    """Buffer ctypes (ctype * size) del thread corrente: allocato al primo uso, poi riusato.
+    Non viene azzerato: l'API sovrascrive i valori prima che vengano letti."""
+    buf = getattr(_POOL, name, None)
+    if buf is None or len(buf) < size:
+        buf = (ctype * size)()
+        setattr(_POOL, name, buf)
+    return buf
+
 # ----------------------------- Apertura file modello + risultati -----------------------------
-def _open(uID: int, model_path: str) -> None:
-    """Apre il file .st7 con percorso scratch. Firma: (long uID, char* FileName, char* ScratchPath)."""
-    st7.St7OpenFile.argtypes = [ct.c_long, ct.c_char_p, ct.c_char_p]
-    st7.St7OpenFile.restype  = ct.c_long
+_SEP_B = os.sep.encode("ascii")
+
+# Opzione: usa eventuali combinazioni già presenti nel file risultati
+_COMB_EXISTING = getattr(st7, "kUseExistingCombinations", 0)  # fallback se costante non presente
+
 
-    # Cartella scratch accanto al modello: Straus7 la usa per file temporanei
-    scratch = os.path.join(os.path.dirname(os.path.abspath(model_path)), "_scratch")
-    os.makedirs(scratch, exist_ok=True)
+@lru_cache(maxsize=64)
+def _mbcs(path: str) -> bytes:
+    """Percorso → bytes MBCS per l'API, codificato una volta sola per percorso."""
+    return os.fspath(path).encode("mbcs")
 
-    fn = os.fspath(model_path).encode("mbcs")
-    sp = os.path.abspath(scratch).encode("mbcs")
+
+@lru_cache(maxsize=64)
+def _open_paths(model_path: str) -> tuple[bytes, bytes, str]:
+    """(modello MBCS, scratch MBCS, scratch) per model_path ASSOLUTO, calcolati una volta per percorso.
+    Cartella scratch accanto al modello: Straus7 la usa per file temporanei."""
+    scratch = os.path.join(os.path.dirname(model_path), "_scratch")
+    return _mbcs(model_path), _mbcs(scratch), scratch
+
+
+def _open(uID: int, model_path: str, read_only: bool = False) -> None:
+    """Apre il file .st7 con percorso scratch. Firma: (long uID, char* FileName, char* ScratchPath).
+    Con read_only=True usa St7OpenFileReadOnly (sessioni aggiuntive sullo stesso modello)."""
+    open_fn = st7.St7OpenFileReadOnly if read_only else st7.St7OpenFile
+
+    # chiave di cache assoluta: un percorso relativo non riusa lo scratch di un'altra cwd
+    fn, sp, scratch = _open_paths(os.path.abspath(model_path))
+    os.makedirs(scratch, exist_ok=True)     # la cartella può essere stata rimossa fra due aperture
 
     # Chiamata API apertura modello
-    i = st7.St7OpenFile(ct.c_long(uID), ct.c_char_p(fn), ct.c_char_p(sp))
+    i = open_fn(ct.c_long(uID), ct.c_char_p(fn), ct.c_char_p(sp))
     if i != 0:
         # In caso di errore, decodifica le cause fornite dall’API per una diagnosi rapida
         code = st7.St7GetLastOpenFileCode()
@@ -53,50 +99,70 @@ def _open(uID: int, model_path: str) -> None:
 
 def _open_results(uID: int, model_path: str) -> None:
     """Apre un file risultati compatibile (.lsa prioritario, altrimenti .sra) nella stessa cartella del .st7."""
-    # Firme funzioni risultati (da manuale API)
-    st7.St7OpenResultFile.argtypes = [
-        ct.c_long, ct.c_char_p, ct.c_char_p, ct.c_long,
-        ct.POINTER(ct.c_long), ct.POINTER(ct.c_long)
-    ]
-    st7.St7OpenResultFile.restype = ct.c_long
-    st7.St7ValidateResultFile.argtypes = [ct.c_long, ct.c_char_p, ct.POINTER(ct.c_long), ct.POINTER(ct.c_long)]
-    st7.St7ValidateResultFile.restype  = ct.c_long
-
     base = os.path.dirname(os.path.abspath(model_path))
     stem = os.path.splitext(os.path.basename(model_path))[0]
 
-    # Opzione: usa eventuali combinazioni già presenti nel file risultati
-    comb = getattr(st7, "kUseExistingCombinations", 0)  # fallback se costante non presente
-
-    def _try_open(fullpath: str) -> bool:
-        """Prova ad aprire 'fullpath' come risultati. Ritorna True se ok."""
-        numP, numS = ct.c_long(0), ct.c_long(0)
-        i = st7.St7OpenResultFile(
-            ct.c_long(uID),
-            os.fspath(fullpath).encode("mbcs"),
-            ct.c_char_p(b""),              # SpectralName nullo → usa default del file
-            ct.c_long(comb),               # combina usando l’eventuale .LSC
-            ct.byref(numP), ct.byref(numS)
+    # Riferimenti locali: la closure non rilegge attributi di modulo a ogni tentativo
+    open_result = st7.St7OpenResultFile
+    byref       = ct.byref
+    uid_c       = ct.c_long(uID)
+    comb_c      = ct.c_long(_COMB_EXISTING)          # combina usando l’eventuale .LSC
+    numP, numS  = ct.c_long(0), ct.c_long(0)         # out-param condivisi fra i tentativi
+
+    def _try_open(fullpath: str, fullpath_b: bytes) -> bool:
+        """Prova ad aprire 'fullpath' (fullpath_b: stesso percorso già in MBCS) come risultati.
+        Ritorna True se ok. os.stat usa il percorso str: i bytes su Windows sono letti come UTF-8."""
+        i = open_result(
+            uid_c,
+            fullpath_b,
+            b"",                           # SpectralName nullo → usa default del file
+            comb_c,
+            byref(numP), byref(numS)
         )
-        return i == 0
+        if i != 0:
+            return False
+        # Result Case = primari + secondari (combinazioni): limite superiore per le scansioni
+        _NUM_CASES[uID] = numP.value + numS.value
+        st_ = os.stat(fullpath)
+        _RESULT_FILE[uID] = (fullpath, st_.st_mtime_ns, st_.st_size)
+        return True
 
     # 1) Prova <modello>.lsa (risultati lineari)
     cand = os.path.join(base, stem + ".lsa")
-    if os.path.isfile(cand) and _try_open(cand):
+    if os.path.isfile(cand) and _try_open(cand, _mbcs(cand)):
         return
 
+    # Una sola scansione della cartella: DirEntry ha già nome/percorso/tipo, niente stat extra.
+    # Classificazione per estensione in un passaggio; is_file solo per .lsa/.sra.
+    lsa_names, sra_names = [], []
+    with os.scandir(base) as it:
+        for e in it:
+            ext = e.name[-4:].lower()
+            if ext == ".lsa":
+                dst = lsa_names
+            elif ext == ".sra":
+                dst = sra_names
+            else:
+                continue
+            if e.is_file():
+                dst.append(e.name)
+    # coppie (str, bytes MBCS): cartella codificata una volta + solo il nome di ogni file
+    prefix = _mbcs(base) + _SEP_B
+    lsa = [(os.path.join(base, n), prefix + n.encode("mbcs")) for n in sorted(lsa_names)]
+    sra = [(os.path.join(base, n), prefix + n.encode("mbcs")) for n in sorted(sra_names)]
+
     # 2) In alternativa, qualunque .lsa valido nella cartella
-    for fn in sorted(os.listdir(base)):
-        if fn.lower().endswith(".lsa"):
-            full = os.path.join(base, fn)
-            vc, sv = ct.c_long(0), ct.c_long(0)
-            st7.St7ValidateResultFile(ct.c_long(uID), os.fspath(full).encode("mbcs"), ct.byref(vc), ct.byref(sv))
-            if _try_open(full):
-                return
+    validate = st7.St7ValidateResultFile
+    vc, sv = ct.c_long(0), ct.c_long(0)
+    p_vc, p_sv = byref(vc), byref(sv)
+    for full, full_b in lsa:
+        validate(uid_c, full_b, p_vc, p_sv)
+        if _try_open(full, full_b):
+            return
 
     # 3) Fallback: cerca un .sra (risposta spettrale)
-    for fn in sorted(os.listdir(base)):
-        if fn.lower().endswith(".sra") and _try_open(os.path.join(base, fn)):
+    for full, full_b in sra:
+        if _try_open(full, full_b):
             return
 
     raise RuntimeError("Nessun file risultati aperto (.lsa/.sra).")
@@ -104,6 +170,7 @@ def _open_results(uID: int, model_path: str) -> None:
 
 def _close(uID: int) -> None:
     """Chiude il file modello. UnLoad lo fa il chiamante se necessario."""
+    _forget_cases(uID)
     try:
         st7.St7CloseFile(uID)
     except Exception:
@@ -111,36 +178,82 @@ def _close(uID: int) -> None:
 
 
 # ----------------------------- Utilità per Result Case ---------------------------------------
+# Cache dei Result Case già risolti: {((file_risultati, mtime_ns, size), token_normalizzati): rc}.
+# Sopravvive a _close: riaprendo lo stesso file non riscritto non si rilegge nessun nome;
+# un file risultati rigenerato dal solver cambia mtime/size e quindi chiave.
+_CASE_CACHE: dict[tuple[tuple[str, int, int], tuple[str, ...]], int] = {}
+# Numero di Result Case del file risultati aperto su ogni uID (da St7OpenResultFile).
+_NUM_CASES: dict[int, int] = {}
+# Identità del file risultati aperto su ogni uID: (percorso, mtime_ns, size).
+_RESULT_FILE: dict[int, tuple[str, int, int]] = {}
+
+
+def _forget_cases(uID: int) -> None:
+    """Dimentica il file risultati aperto su 'uID' (i case risolti restano in _CASE_CACHE)."""
+    _NUM_CASES.pop(uID, None)
+    _RESULT_FILE.pop(uID, None)
+
+
+def _case_limit(uID: int, limit: int = 2048) -> int:
+    """Ultimo ID di Result Case da scandire: il totale del file se noto, altrimenti 'limit'."""
+    n = _NUM_CASES.get(uID, 0)
+    return min(n, limit) if n > 0 else limit
+
+
+_NON_ALNUM = re.compile(r"[\W_]+")   # tutto ciò che non è lettera/cifra (Unicode, come isalnum)
+
+
 def _norm(s: str) -> str:
     """Normalizza stringa per confronto robusto: minuscole + rimuove caratteri non alfanumerici."""
-    return "".join(ch for ch in s.lower() if ch.isalnum())
+    return _NON_ALNUM.sub("", s.lower())
+
+
+def _match_tokens(tokens: list[str]) -> list[str]:
+    """
+    Token normalizzati per il match, ridotti e ordinati una volta per chiamata:
+    - vuoti e duplicati tolti; un token contenuto in un altro è implicito e viene tolto;
+    - dal più lungo (più selettivo): all(...) scarta i nomi sbagliati già al primo test.
+    """
+    want = sorted({n for n in map(_norm, filter(None, tokens)) if n}, key=lambda t: (-len(t), t))
+    return [t for i, t in enumerate(want) if not any(t in u for u in want[:i])]
+
+
+def _case_names(uID: int, limit: int = 2048):
+    """Genera (rc, nome) per i Result Case con nome non vuoto, in ordine di ID."""
+    buf = _get_buf("name", ct.c_char, st7.kMaxStrLen)
+    get_name = st7.St7GetResultCaseName
+    for rc in range(1, _case_limit(uID, limit) + 1):
+        if get_name(uID, rc, buf, st7.kMaxStrLen) != 0:
+            continue
+        name = buf.value.decode("mbcs", errors="ignore")
+        if name:
+            yield rc, name
 
 
 def _resolve_case_tokens(uID: int, tokens: list[str], limit: int = 2048) -> int:
     """
     Trova un Result Case il cui nome normalizzato contiene TUTTI i token normalizzati.
     Esempi token: ["linear static", "combination", "slu"] oppure solo ["slu"].
+    Si ferma al primo case che corrisponde (nessuna lista completa dei candidati).
     Se non trovato: lancia eccezione con l’elenco dei nomi disponibili utili per il debug.
     """
-    buf = ct.create_string_buffer(st7.kMaxStrLen)
-    want = [_norm(t) for t in tokens if t]
-    candidates = []
-    for rc in range(1, limit + 1):
-        if st7.St7GetResultCaseName(uID, rc, buf, st7.kMaxStrLen) != 0:
-            continue
-        name = buf.value.decode("mbcs", errors="ignore")
-        if not name:
-            continue
-        candidates.append((rc, name, _norm(name)))
-
-    # Match: tutti i token devono comparire nella versione normalizzata
-    for rc, nm, nnm in candidates:
+    want = _match_tokens(tokens)
+    res_file = _RESULT_FILE.get(uID)
+    key = (res_file, tuple(want))
+    if res_file is not None and key in _CASE_CACHE:
+        return _CASE_CACHE[key]
+
+    for rc, name in _case_names(uID, limit):
+        # Match: tutti i token devono comparire nella versione normalizzata
+        nnm = _norm(name)
         if all(t in nnm for t in want):
+            if res_file is not None:
+                _CASE_CACHE[key] = rc
             return rc
 
-    # Diagnosi se non trovato
-    available = [nm for _, nm, _ in candidates]
-    raise RuntimeError(f"Result case non trovato per tokens {tokens}. Disponibili: {available}")
+    # Diagnosi se non trovato: i nomi si raccolgono solo qui, con una seconda lettura
+    seen = [name for _, name in _case_names(uID, limit)]
+    raise RuntimeError(f"Result case non trovato per tokens {tokens}. Disponibili: {seen}")
 
 
 # ----------------------------- Conteggio travi ------------------------------------------------
@@ -152,30 +265,130 @@ def _n_beams(uID: int) -> int:
     return n.value
 
 # ----------------------------- Utility: leggi proprietà beam ---------------------------------
-def _beam_prop_name(uID: int, beam_num: int) -> tuple[int, str]:
-    """Ritorna (numero_prop, nome_prop) del beam."""
-    prop = ct.c_long()
-    st7.St7GetElementProperty.argtypes = [ct.c_long, ct.c_long, ct.c_long, ct.POINTER(ct.c_long)]
-    st7.St7GetElementProperty.restype  = ct.c_long
-    ierr = st7.St7GetElementProperty(uID, st7.ptBEAMPROP, beam_num, ct.byref(prop))
-    if ierr != 0:
-        return (0, "")
-    buf = ct.create_string_buffer(st7.kMaxStrLen)
-    st7.St7GetPropertyName.argtypes = [ct.c_long, ct.c_long, ct.c_long, ct.c_char_p, ct.c_long]
-    st7.St7GetPropertyName.restype  = ct.c_long
-    st7.St7GetPropertyName(uID, st7.ptBEAMPROP, prop.value, buf, st7.kMaxStrLen)
-    return (prop.value, buf.value.decode("mbcs", errors="ignore"))
+def _beam_prop_names(uID: int) -> dict[int, str]:
+    """Ritorna {numero_prop: nome_prop} per tutte le proprietà BEAM (una chiamata per proprietà)."""
+    nums = _get_buf("tot_nums", ct.c_long, st7.kMaxEntityTotals)
+    last = _get_buf("tot_last", ct.c_long, st7.kMaxEntityTotals)
+    if st7.St7GetTotalProperties(uID, nums, last) != 0:
+        raise RuntimeError("St7GetTotalProperties failed")
+
+    pn  = ct.c_long()
+    buf = _get_buf("name", ct.c_char, st7.kMaxStrLen)
+    names = {}
+    get_num, get_name = st7.St7GetPropertyNumByIndex, st7.St7GetPropertyName
+    pt_beam, kmax, p_pn = st7.ptBEAMPROP, st7.kMaxStrLen, ct.byref(pn)
+    for idx in range(1, nums[st7.ipBeamPropTotal] + 1):
+        if get_num(uID, pt_beam, idx, p_pn) != 0:
+            continue
+        get_name(uID, pt_beam, pn.value, buf, kmax)
+        names[pn.value] = buf.value.decode("mbcs", errors="ignore")
+    return names
+
+
+# ----------------------------- Kernel η per una trave ----------------------------------------
+def _eta_max_np(res: np.ndarray, i_mx: int, i_mn: int, i_sy: int, den: float) -> float:
+    """ηmax lungo la trave da 'res' (ns, nc): versione NumPy vettoriale."""
+    FBabs = np.maximum(np.abs(res[:, i_mx]), np.abs(res[:, i_mn]))
+    SY    = np.abs(res[:, i_sy])
+    # (FB/den)^2 + 3(SY/den)^2 = (FB^2 + 3 SY^2) / den^2: den applicato una volta sola al massimo
+    v2 = FBabs*FBabs + 3.0*(SY*SY)
+    return math.sqrt(v2.max()) / den if v2.size else 0.0     # sqrt monotona: una sola radice per trave
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _eta_max(res, i_mx, i_mn, i_sy, den):
+        """Come _eta_max_np, ma in un solo passaggio senza array temporanei (Numba)."""
+        best = 0.0
+        for k in range(res.shape[0]):
+            fb = max(abs(res[k, i_mx]), abs(res[k, i_mn]))
+            sy = abs(res[k, i_sy])
+            v2 = fb*fb + 3.0*sy*sy
+            if v2 > best:
+                best = v2
+        return math.sqrt(best) / den     # sqrt monotona: max(sqrt) == sqrt(max); den fuori dal loop
+else:
+    _eta_max = _eta_max_np
+
+# ----------------------------- Estrazione η per gruppo di travi ------------------------------
+def _scan_beams(uID: int, beams, rc: int, min_st: int, den: float,
+                stop: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per le travi in 'beams' ritorna due array allineati: numero_prop (int) e ηmax lungo la trave.
+    Usa buffer ctypes propri: può girare in parallelo su uID diversi.
+    stop: se una trave supera questo η la scansione termina (travi restanti a 0).
+    """
+    st7.St7SetBeamResultPosMode(uID, st7.bpParam)
+
+    BeamPos     = _get_buf("beam_pos", ct.c_double, st7.kMaxBeamResult)     # riusati tra chiamate
+    BeamResult  = _get_buf("beam_result", ct.c_double, st7.kMaxBeamResult)
+    NumStations = ct.c_long()
+    NumColumns  = ct.c_long()
+    PropNum     = ct.c_long()                               # out-param riusato per ogni trave
+
+    i_max_fibre = st7.ipMaxFibreStress
+    i_min_fibre = st7.ipMinFibreStress
+    i_shear_y   = st7.ipShearF2MeanShearStress
+
+    # Confine Python↔C ridotto al minimo per trave: funzioni, costanti e puntatori byref
+    # risolti una volta; nel loop restano le due chiamate API e il kernel η.
+    get_prop    = st7.St7GetElementProperty
+    get_result  = st7.St7GetBeamResultArray
+    pt_beam     = st7.ptBEAMPROP
+    rt_stress   = st7.rtBeamAllStress
+    st_princ    = st7.stBeamPrincipal
+    rc_i, den_f = int(rc), float(den)
+    p_prop, p_ns, p_nc = ct.byref(PropNum), ct.byref(NumStations), ct.byref(NumColumns)
+    flat = np.frombuffer(BeamResult, dtype=np.float64)     # vista unica sul buffer risultati
+
+    props = np.zeros(len(beams), dtype=np.int64)
+    etas  = np.zeros(len(beams), dtype=np.float64)
+    for j, b in enumerate(beams):
+        props[j] = PropNum.value if get_prop(uID, pt_beam, b, p_prop) == 0 else 0
+
+        ierr = get_result(uID, rt_stress, st_princ, b, min_st, rc_i, p_ns, p_nc, BeamPos, BeamResult)
+        if ierr != 0:
+            raise RuntimeError(f"GetBeamResultArray iErr={ierr} (beam {b})")
+
+        ns, nc = NumStations.value, NumColumns.value
+
+        # vista NumPy (ns, nc) sul buffer ctypes: nessuna copia, una riga per stazione
+        res = flat[:ns * nc].reshape(ns, nc)
+
+        # un solo valore per trave: il suo massimo lungo le stazioni
+        etas[j] = _eta_max(res, i_max_fibre, i_min_fibre, i_shear_y, den_f)
+        if stop is not None and etas[j] > stop:
+            break                                           # verifica già non soddisfatta
+
+    return props, etas
+
+
+def _scan_beams_session(uID: int, model_path: str, beams, rc: int, min_st: int, den: float,
+                        stop: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Come _scan_beams, ma su una sessione uID dedicata (modello in sola lettura + risultati)."""
+    _open(uID, model_path, read_only=True)
+    try:
+        _open_results(uID, model_path)
+        return _scan_beams(uID, beams, rc, min_st, den, stop)
+    finally:
+        _close(uID)
 
 # ----------------------------- Core: calcolo massimo valore ----------------------------------
 def max_check_value(model_path: str,
                     case_name: str | list[str],
                     stations: int = 100,
                     den: float = 1,
-                    print_table: bool = True) -> float:
+                    print_table: bool = True,
+                    workers: int = 1,
+                    early_exit: float | None = None) -> float:
     """
     Calcola η e stampa la tabella. In più:
     - stampa una riga 'Combination SLU' o 'Combination SLV' (o il nome case reale)
     - stampa ηmax per prop1 e prop2 a fine tabella
+    - workers > 1: estrazione travi in parallelo su sessioni uID distinte
+    - early_exit: soglia η (es. 1.0); appena una trave la supera le travi non ancora lette
+      vengono saltate. Il risultato dice solo "verifica non soddisfatta": ηmax e i massimi
+      per proprietà sono quelli delle travi lette fino a quel punto.
     """
 
     uID = 1
@@ -189,7 +402,7 @@ def max_check_value(model_path: str,
         rc = _resolve_case_tokens(uID, tokens)
 
         # --- ricava nome reale del case per stampa header "Combination ..." ---
-        buf = ct.create_string_buffer(st7.kMaxStrLen)
+        buf = _get_buf("name", ct.c_char, st7.kMaxStrLen)
         st7.St7GetResultCaseName(uID, rc, buf, st7.kMaxStrLen)
         rc_real_name = buf.value.decode("mbcs", errors="ignore").strip()
 
@@ -203,20 +416,6 @@ def max_check_value(model_path: str,
                 break
         comb_label = wanted_label if wanted_label else rc_real_name or "Unknown"
 
-        # --- set API per beam results ---
-        st7.St7GetBeamResultArray.argtypes = [
-            ct.c_long, ct.c_long, ct.c_long, ct.c_long, ct.c_long, ct.c_long,
-            ct.POINTER(ct.c_long), ct.POINTER(ct.c_long),
-            ct.POINTER(ct.c_double), ct.POINTER(ct.c_double),
-        ]
-        st7.St7GetBeamResultArray.restype = ct.c_long
-        st7.St7SetBeamResultPosMode(uID, st7.bpParam)
-
-        BeamPos     = (ct.c_double * st7.kMaxBeamResult)()
-        BeamResult  = (ct.c_double * st7.kMaxBeamResult)()
-        NumStations = ct.c_long()
-        NumColumns  = ct.c_long()
-
         min_st = int(stations)
         if min_st < 1:
             min_st = 1
@@ -228,10 +427,8 @@ def max_check_value(model_path: str,
         vmax_propnum = 0
         vmax_propname = ""
 
-        # ηmax per proprietà 1 e 2: {propnum: (ηmax, nome_prop)}
-        eta_max_by_prop = {1: (0.0, ""), 2: (0.0, "")}
-
         nbeams = _n_beams(uID)
+        prop_names = _beam_prop_names(uID)   # {numero_prop: nome}, letto una volta
 
         # --- stampa intestazioni ---
         if print_table:
@@ -241,54 +438,47 @@ def max_check_value(model_path: str,
             #print(header)
             #print("-" * len(header))
 
-        # --- loop travi ---
-        for b in range(1, nbeams + 1):
-            propnum, propname = _beam_prop_name(uID, b)
-
-            ierr = st7.St7GetBeamResultArray(
-                uID, st7.rtBeamAllStress, st7.stBeamPrincipal, b, min_st, int(rc),
-                ct.byref(NumStations), ct.byref(NumColumns), BeamPos, BeamResult
-            )
-            if ierr != 0:
-                raise RuntimeError(f"GetBeamResultArray iErr={ierr} (beam {b})")
-
-            ns, nc = NumStations.value, NumColumns.value
-            i_max_fibre = st7.ipMaxFibreStress
-            i_min_fibre = st7.ipMinFibreStress
-            i_shear_y   = st7.ipShearF2MeanShearStress
-
-            for k in range(ns):
-                s_par = BeamPos[k]
-                base  = k * nc
-
-                s_max = BeamResult[base + i_max_fibre]
-                s_min = BeamResult[base + i_min_fibre]
-                s_y   = BeamResult[base + i_shear_y]
-
-                FBmax = abs(s_max)
-                FBmin = abs(s_min)
-                FBabs = max(FBmax, FBmin)
-                SY    = abs(s_y)
-
-                val = ((FBabs/den)**2 + 3.0*(SY/den)**2)**0.5
-
-                if val > vmax:
-                    vmax = val
-                    vmax_beam = b
-                    vmax_propnum, vmax_propname = propnum, propname
-
-                if propnum in eta_max_by_prop and val > eta_max_by_prop[propnum][0]:
-                    eta_max_by_prop[propnum] = (val, propname)
-
-                #if print_table:
-                    #print(f"{b:5d} {s_par:6.3f} {s_max:15.2f} {s_min:15.2f} {s_y:12.2f} {FBabs:15.2f} {val:10.3f}")
+        # --- estrazione travi (seriale o su più sessioni uID) ---
+        # props[i], etas[i] si riferiscono alla trave i+1
+        props = np.zeros(nbeams, dtype=np.int64)
+        etas  = np.zeros(nbeams, dtype=np.float64)
+        workers = max(1, min(int(workers), nbeams))
+        if workers == 1:
+            props[:], etas[:] = _scan_beams(uID, range(1, nbeams + 1), rc, min_st, den, early_exit)
+        else:
+            # blocchi contigui di travi: ogni sessione legge un tratto consecutivo del file risultati;
+            # il gruppo 0 usa la sessione già aperta
+            bounds = [1 + (nbeams * w) // workers for w in range(workers + 1)]
+            groups = [range(bounds[w], bounds[w + 1]) for w in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                futs = [ex.submit(_scan_beams, uID, groups[0], rc, min_st, den, early_exit)]
+                futs += [ex.submit(_scan_beams_session, uID + w, model_path, groups[w], rc, min_st, den,
+                                   early_exit)
+                         for w in range(1, workers)]
+                for w, f in enumerate(futs):
+                    lo, hi = bounds[w] - 1, bounds[w + 1] - 1
+                    props[lo:hi], etas[lo:hi] = f.result()
+
+        # --- riduzione: ηmax globale (prima trave in caso di parità) ---
+        if nbeams and etas.max() > vmax:
+            k = int(etas.argmax())
+            vmax = float(etas[k])
+            vmax_beam = k + 1
+            vmax_propnum = int(props[k])
+            vmax_propname = prop_names.get(vmax_propnum, "")
+
+        # --- ηmax per proprietà: array indicizzato per numero_prop (almeno 1 e 2) ---
+        eta_per_prop = np.zeros(max(2, int(props.max(initial=0))) + 1, dtype=np.float64)
+        np.maximum.at(eta_per_prop, props, etas)
+        name_per_prop = [prop_names.get(p, "") if eta_per_prop[p] > 0.0 else ""
+                         for p in range(eta_per_prop.size)]
 
         # --- riepilogo richiesto: ηmax per prop1 e prop2 ---
         if print_table:
-            v1, n1 = eta_max_by_prop.get(1, (0.0, ""))
-            v2, n2 = eta_max_by_prop.get(2, (0.0, ""))
-            print(f"η max column [{n1}] = {v1:.3f}")
-            print(f"η max beam [{n2}] = {v2:.3f}")
+            v1, n1 = eta_per_prop[1], name_per_prop[1]
+            v2, n2 = eta_per_prop[2], name_per_prop[2]
+            print(f"η max column [{n1}] = {v1:.3f}\n"
+                  f"η max beam [{n2}] = {v2:.3f}")          # riepilogo in una sola scrittura
 
         return vmax, vmax_beam, vmax_propnum, vmax_propname
 
@@ -306,12 +496,8 @@ def list_result_cases(model_path: str) -> None:
         _open(uID, model_path)
         _open_results(uID, model_path)
 
-        buf = ct.create_string_buffer(st7.kMaxStrLen)
         print("=== Result Cases disponibili ===")
-        for rc in range(1, 2048):
-            if st7.St7GetResultCaseName(uID, rc, buf, st7.kMaxStrLen) == 0:
-                name = buf.value.decode("mbcs", errors="ignore")
-                if name:
-                    print(f"{rc:4d}: {name}")
+        for rc, name in _case_names(uID):
+            print(f"{rc:4d}: {name}")
     finally:
         _close(uID)
@@ -1,5 +1,6 @@
 """Importa 3 accelerogrammi in Straus7 (LAYOUTS → Tables → Acceleration vs Time)."""  # doc del modulo
 # Funzioni principali:
+# - load_accelerograms(files) → List[(t, a)]                                          # validazione + lettura, senza API
 # - import_accelerograms(uID, files, names=None, units="g") → List[int]                # API con modello già aperto
 # - run(model_path, acc_dir="accelerogram", names=("X","Y","Z"), units="g", uID=1)    # wrapper che apre/salva/chiude
 # Requisiti:
@@ -7,10 +8,18 @@
 
 from __future__ import annotations  # future typing per annotazioni più forti
 
+import io                           # buffer testo in memoria per np.loadtxt
 import os                           # percorsi e filesystem
+import glob                         # ricerca file accelerogramma
+import re                           # filtro righe commento sul buffer
+import mmap                         # lettura file senza copie intermedie
+import array                        # buffer double contiguo senza NumPy
 import ctypes                       # buffer C e chiamate API
+from itertools import chain         # appiattisce le coppie XY
 from typing import Sequence, Tuple, List, Optional  # tipi utili
 
+import numpy as np                  # parsing e ordinamento vettoriali
+
 # --- caricamento St7API.dll per Python ≥3.8 se serve ---
 _DLL_DIR = os.environ.get("STRAUS7_DLL_DIR")        # path opzionale alla DLL
 if _DLL_DIR:                                        # se definita
@@ -35,40 +44,58 @@ def _raise_if_err(ierr: int, ctx: str = "") -> None:  # helper: solleva eccezion
         raise RuntimeError(f"{ctx} St7API error {ierr}: {msg}")  # eccezione con contesto
 
 # ================= Lettura file XY =================
-def _read_xy(path: str) -> List[Tuple[float, float]]:  # legge due colonne t, a da TXT/CSV
-    data: List[Tuple[float, float]] = []               # accumulatore righe valide
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:  # apertura tollerante
-        for raw in f:                                  # scorre righe
-            line = raw.strip()                         # trim spazi
-            if not line or line.startswith("#") or line.startswith("%"):  # salta vuote/commenti
-                continue
-            line = line.replace(";", " ").replace(",", ".")  # normalizza separatori ; e decimali ,
-            parts = [p for p in line.split() if p]           # split su spazi multipli
-            if len(parts) < 2:                               # richiede almeno 2 colonne
-                continue
-            try:
-                t = float(parts[0])                          # tempo
-                a = float(parts[1])                          # accelerazione
-            except ValueError:
-                continue                                     # salta header non numerici
-            data.append((t, a))                              # aggiunge coppia valida
-    if not data:                                            # controllo dati
-        raise ValueError(f"Nessun dato valido in: {path}")   # errore se vuoto
-    data.sort(key=lambda x: x[0])                            # ordina per tempo
-    cleaned: List[Tuple[float, float]] = []                  # lista senza duplicati su t
-    last_t: Optional[float] = None                           # ultimo tempo visto
-    for t, a in data:                                        # dedup su t identico
-        if last_t is None or t != last_t:
-            cleaned.append((t, a))
-            last_t = t
-    return cleaned                                           # ritorna lista ordinata e pulita
-
-def _xy_to_ctypes(data: Sequence[Tuple[float, float]]):      # converte in buffer C interlacciato
-    n = len(data)                                            # numero coppie XY
-    arr = (ctypes.c_double * (2 * n))()                      # array C double[2*n]
-    for i, (x, y) in enumerate(data):                        # riempie [x1,y1,x2,y2,...]
-        arr[2 * i] = float(x)
-        arr[2 * i + 1] = float(y)
+_XY_TRANS = bytes.maketrans(b";,", b" .")                # ; → spazio, decimali , → .
+_COMMENT_RE = re.compile(rb"^[ \t]*[#%][^\r\n]*", re.M)   # righe commento (#, %) → vuote
+_ROW_RE = re.compile(rb"^[ \t]*[-+.\d][^\r\n]*", re.M)    # righe che iniziano come un numero
+
+def _parse_xy_row(line: str) -> Optional[Tuple[float, float]]:  # riga già normalizzata → (t, a) o None
+    line = line.strip()                                # trim spazi
+    if not line or line.startswith("#") or line.startswith("%"):  # salta vuote/commenti
+        return None
+    parts = line.split()                               # split su spazi multipli
+    if len(parts) < 2:                                 # richiede almeno 2 colonne
+        return None
+    try:
+        return float(parts[0]), float(parts[1])        # tempo, accelerazione
+    except ValueError:
+        return None                                    # header non numerici
+
+def _read_xy(path: str) -> Tuple[np.ndarray, np.ndarray]:  # legge due colonne t, a da TXT/CSV
+    if os.path.getsize(path) == 0:                     # mmap non accetta file vuoti
+        raise ValueError(f"Nessun dato valido in: {path}")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        raw = mm[:].translate(_XY_TRANS)               # normalizza separatori in un colpo (C)
+    raw = _COMMENT_RE.sub(b"", raw)                    # elimina i commenti prima del parsing
+    start = len(raw)                                   # salta l'intestazione (righe non numeriche)
+    for m in _ROW_RE.finditer(raw):
+        if _parse_xy_row(m.group().decode("utf-8", "ignore")) is not None:
+            start = m.start()
+            break
+    body = raw[start:].decode("utf-8", "ignore")       # solo il corpo dati
+    if not body.strip():                               # nessuna riga numerica
+        raise ValueError(f"Nessun dato valido in: {path}")
+    try:                                               # percorso veloce: tokenizer C di NumPy
+        data = np.loadtxt(io.StringIO(body), usecols=(0, 1), ndmin=2)
+    except ValueError:                                 # righe spurie nel corpo: filtro riga per riga
+        rows = [r for r in map(_parse_xy_row, body.splitlines()) if r is not None]
+        data = np.array(rows, dtype=np.float64).reshape(-1, 2)
+    if data.shape[0] == 0:                             # controllo dati
+        raise ValueError(f"Nessun dato valido in: {path}")  # errore se vuoto
+    t, idx = np.unique(data[:, 0], return_index=True)  # ordina per t e scarta i duplicati (tiene il primo)
+    return t, data[idx, 1]                             # ritorna array ordinati e puliti
+
+def _xy_to_ctypes(data):                                     # converte in buffer C interlacciato
+    if isinstance(data, tuple) and len(data) == 2 and isinstance(data[0], np.ndarray):
+        t, a = data                                          # array (t, a) da _read_xy
+        n = len(t)                                           # numero coppie XY
+        xy = np.empty(2 * n, dtype=np.float64)               # [x1,y1,x2,y2,...] contiguo
+        xy[0::2] = t                                         # scrittura a stride, niente loop Python
+        xy[1::2] = a
+    else:                                                    # sequenza di coppie (t, a): buffer stdlib
+        xy = array.array("d")
+        xy.extend(chain.from_iterable(data))                 # riempimento in C, niente indici Python
+        n = len(xy) // 2
+    arr = (ctypes.c_double * (2 * n)).from_buffer(xy)        # vista ctypes senza copia (tiene vivo xy)
     return arr, n                                            # ritorna buffer e numero righe
 
 # ================= Gestione Tabelle =================
@@ -84,7 +111,7 @@ def _next_table_id(uID: int, table_type: int) -> int:        # calcola prossimo
 def create_acc_vs_time_table(                                 # crea tabella Acc vs Time e restituisce ID
     uID: int,                                                 # uID del modello aperto
     name: str,                                                # nome tabella
-    data: Sequence[Tuple[float, float]],                      # sequenza XY
+    data,                                                     # array (t, a) da _read_xy o sequenza di coppie XY
     units: str = "g",                                         # "g" o "model"
 ) -> int:
     doubles, n = _xy_to_ctypes(data)                          # prepara buffer interlacciato
@@ -112,23 +139,31 @@ def create_acc_vs_time_table(                                 # crea tabella Acc
 
     return table_id                                           # ritorna ID creato
 
+def load_accelerograms(                                       # valida e legge i file, nessuna chiamata API
+    files: Sequence[str],                                     # tre percorsi file
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    if len(files) != 3:                                       # richiede 3 file
+        raise ValueError("Servono esattamente 3 file accelerogramma")
+    for fp in files:                                          # esistenza di TUTTI i file prima di leggere
+        if not os.path.isfile(fp):
+            raise FileNotFoundError(f"File non trovato: {fp}")
+    return [_read_xy(fp) for fp in files]                     # parsing completo (errori qui, non a metà import)
+
 def import_accelerograms(                                     # crea 1 tabella per ciascun file
     uID: int,                                                 # uID del modello aperto
     files: Sequence[str],                                     # tre percorsi file
     names: Optional[Sequence[str]] = None,                    # nomi tabella opzionali
     units: str = "g",                                         # unità accelerazione
+    series: Optional[Sequence[Tuple[np.ndarray, np.ndarray]]] = None,  # dati già letti (load_accelerograms)
 ) -> List[int]:
-    if len(files) != 3:                                       # richiede 3 file
-        raise ValueError("Servono esattamente 3 file accelerogramma")
     if names is not None and len(names) != len(files):        # validazione nomi
         raise ValueError("`names` deve avere la stessa lunghezza di `files`")
+    if series is None:                                        # valida e legge tutto prima di creare tabelle
+        series = load_accelerograms(files)
 
     table_ids: List[int] = []                                 # risultati
-    for i, fp in enumerate(files):                            # ciclo sui 3 file
-        if not os.path.isfile(fp):                            # verifica esistenza file
-            raise FileNotFoundError(f"File non trovato: {fp}")
+    for i, (fp, xy) in enumerate(zip(files, series)):         # ciclo sui 3 file
         nm = names[i] if names else os.path.splitext(os.path.basename(fp))[0]  # nome tabella
-        xy = _read_xy(fp)                                     # leggi dati XY
         tid = create_acc_vs_time_table(uID, nm, xy, units=units)  # crea tabella
         table_ids.append(tid)                                 # accoda ID
     return table_ids                                          # ritorna lista di ID
@@ -146,11 +181,10 @@ def run(                                                      # apre modello, im
         raise FileNotFoundError(f"Modello non trovato: {model_path}")
     acc_dir = os.path.abspath(acc_dir)                        # normalizza cartella accelerogrammi
 
-    files = [                                                 # costruisce 3 percorsi file
-        os.path.join(acc_dir, "acc1.txt"),
-        os.path.join(acc_dir, "acc2.txt"),
-        os.path.join(acc_dir, "acc3.txt"),
-    ]
+    files = sorted(glob.glob(os.path.join(acc_dir, "acc*.[tT][xX][tT]")))[:3]  # una sola lettura cartella: acc1, acc2, acc3
+    if len(files) < 3:                                        # mancano file: errore prima di leggere/aprire
+        raise FileNotFoundError(f"Servono 3 file acc*.txt in {acc_dir}, trovati {len(files)}")
+    series = load_accelerograms(files)                        # file mancanti/illeggibili: errore prima di St7Init
 
     _raise_if_err(St7API.St7Init(), "St7Init")                # inizializza API
     try:
@@ -164,7 +198,7 @@ def run(                                                      # apre modello, im
             "St7OpenFile",
         )
         try:
-            ids = import_accelerograms(uID, files, names=names, units=units)  # importa tabelle
+            ids = import_accelerograms(uID, files, names=names, units=units, series=series)  # importa tabelle
             _raise_if_err(St7API.St7SaveFile(uID), "St7SaveFile")             # salva
             return ids                                                        # ritorna ID creati
         finally:
@@ -182,6 +216,8 @@ if __name__ == "__main__":                                    # esecuzione diret
     p.add_argument("--scratch", default=os.getcwd(), help="Cartella scratch")       # cartella scratch
     p.add_argument("--units", choices=["g", "model"], default="g")                  # scelta unità
     args = p.parse_args()                                                           # parsing
+    files = [os.path.abspath(f) for f in args.files]                                # normalizza file passati a CLI
+    series = load_accelerograms(files)                                              # valida prima di aprire il modello
 
     _raise_if_err(St7API.St7Init(), "St7Init")               # init API
     try:
@@ -196,8 +232,7 @@ if __name__ == "__main__":                                    # esecuzione diret
             "St7OpenFile",
         )
         try:
-            files = [os.path.abspath(f) for f in args.files] # normalizza file passati a CLI
-            ids = import_accelerograms(uID, files, units=args.units)  # importa
+            ids = import_accelerograms(uID, files, units=args.units, series=series)  # importa
             print("Creati TableID:", ids)                    # output IDs su stdout
             _raise_if_err(St7API.St7SaveFile(uID), "St7SaveFile")     # salva
         finally:
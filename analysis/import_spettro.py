@@ -43,35 +43,24 @@ def _close_model(uID: int):
 
 
 # ------------------------------ I/O TXT -----------------------------------
+# Numero decimale "semplice" (il separatore decimale ',' è già stato convertito in '.')
+_NUM = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+_SEP = r"(?:[^\S\n]|;)"          # spazi/tab/';' dentro la riga
+# Prime due colonne numeriche di una riga. Le righe di intestazione ("T[s] ...", testo)
+# e quelle con token non numerici non corrispondono e vengono saltate.
+_ROW = re.compile(rf"^{_SEP}*({_NUM}){_SEP}+({_NUM})(?={_SEP}|$)", re.M)
+
 def _read_txt(path: str):
     """Ritorna np.ndarray T[s], Sd[g] esattamente come nel file.
        Nessun ordinamento, nessun filtro, nessuna deduplicazione."""
-    T, Sd = [], []
+    # lettura in blocco + una sola scansione regex, conversione numerica fatta da NumPy
     with open(path, "r", encoding="utf-8") as f:
-        for ln in f:
-            s = ln.strip()
-            if not s:
-                continue
-            # salta header semplici
-            if s.startswith("T[") or s[0].isalpha():
-                continue
-            # parsing tollerante a virgole/; e spazi multipli
-            s = s.replace(",", ".")
-            s = re.sub(r"[;,\s]+", " ", s)
-            parts = s.split()
-            if len(parts) < 2:
-                continue
-            try:
-                t = float(parts[0])
-                sd = float(parts[1])
-            except ValueError:
-                continue
-            if np.isfinite(t) and np.isfinite(sd):
-                T.append(t)
-                Sd.append(sd)
-
-    T = np.asarray(T, dtype="d")
-    Sd = np.asarray(Sd, dtype="d")
+        text = f.read().replace(",", ".")
+    pairs = np.array(_ROW.findall(text), dtype="d").reshape(-1, 2)
+    pairs = pairs[np.isfinite(pairs).all(axis=1)]
+
+    T = np.ascontiguousarray(pairs[:, 0])
+    Sd = np.ascontiguousarray(pairs[:, 1])
     if T.size == 0:
         raise ValueError("Spettro vuoto.")
 
@@ -103,7 +92,7 @@ def _new_table_with_data(uID: int, table_id: int, name: bytes, T: np.ndarray, Sd
     xy = np.empty(2 * n, dtype="d")
     xy[0::2] = T
     xy[1::2] = Sd
-    buf = (C.c_double * (2 * n))(*xy)
+    buf = (C.c_double * (2 * n)).from_buffer(xy)   # vista ctypes senza copia (tiene vivo xy)
 
     # crea tabella con N righe già popolata
     err = st7.St7NewTableType(uID, st7.ttVsFrequency, table_id, n, name, buf)
@@ -134,15 +123,18 @@ def run(model_path: str,
         spectrum_txt: str = SPECTRUM_TXT,
         uID: int = MODEL_UID,
         table_id: int = TABLE_ID,
-        table_name: bytes = TABLE_NAME):
+        table_name: bytes = TABLE_NAME,
+        opened: bool = False):
     """
     Flusso richiesto:
       1) New table  → ttVsFrequency con TableID scelto (CREATA GIÀ CON I DATI)
       2) Set name   → 'design_spectre'
       3) Set type   → asse X = Period
       4) Set units  → Acceleration Response (g)
+    opened=True: modello già aperto su uID dal chiamante (nessun init/open/save/close qui).
     """
-    _open_model(uID, model_path)
+    if not opened:
+        _open_model(uID, model_path)
     try:
         # Leggi e prepara i dati
         T, Sd = _read_txt(spectrum_txt)
@@ -161,7 +153,8 @@ def run(model_path: str,
             "units": "Acceleration Response (g)"
         }
     finally:
-        _close_model(uID)
+        if not opened:
+            _close_model(uID)
     return out
 
 
@@ -16,6 +16,8 @@
 
 import os
 import ctypes as ct
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 os.add_dll_directory(r"C:\Program Files\Straus7 R31\Bin64")
 from St7API import *  # Import all from St7API
@@ -25,7 +27,9 @@ except ImportError:
     solver_lin_static = 1  # Fallback value if not defined in St7API
 
 # ---------- utilità minime ----------
+@lru_cache(maxsize=256)
 def _b(s: str) -> bytes:
+    # nomi combo ("SLU", "SLV q=4") e path si ripetono: codifica una volta sola
     return s.encode("utf-8")
 
 def check(rc: int):
@@ -93,6 +97,7 @@ def lsa_combine_and_solve(model_path: str,
     start_count = ncomb.value
 
     created = {}
+    rows = []  # (indice combo, load case, coefficiente) da impostare in un unico passaggio
     # aggiungiamo in coda: la prima nuova avrà indice start_count+1
     for i, (name, factors) in enumerate(combos.items(), start=1):
         new_idx = start_count + i
@@ -100,16 +105,20 @@ def lsa_combine_and_solve(model_path: str,
         check(St7AddLSACombination(uID, _b(name)))
         # (opzionale ma sicuro) rinomina esplicitamente
         check(St7SetLSACombinationName(uID, new_idx, _b(name)))
-        # imposta i fattori per ogni LC coinvolto nella combo
-        for lc, coeff in factors.items():
-            check(St7SetLSACombinationFactor(uID, ltype_lc, new_idx, lc, freedom_case, float(coeff)))
         # (opzionale) assicura che la combinazione sia “enabled”
         try:
             check(St7SetLSACombinationState(uID, new_idx, True))
         except Exception:
             pass
+        # fattori nulli omessi: Straus7 parte già da 0 per ogni LC della combinazione
+        rows.extend((new_idx, lc, coeff) for lc, coeff in factors.items() if coeff != 0.0)
         created[name] = new_idx
 
+    # imposta i fattori di tutte le combo in un solo loop (funzione risolta una volta)
+    set_factor = St7SetLSACombinationFactor
+    for new_idx, lc, coeff in rows:
+        check(set_factor(uID, ltype_lc, new_idx, lc, freedom_case, coeff))
+
     # 4) lancia solver Linear Static
     #    Firma corretta: St7RunSolver(uID, Solver, Mode, Wait) -> TUTTI long
     #    - Solver: costante 'solver_lin_static' (dal tuo St7API.py)
@@ -154,3 +163,25 @@ def lsa_combine_and_solve(model_path: str,
         "load_cases": {"G1": lc_G1, "G2": lc_G2, "Q": lc_Q},
         "combinations": created,  # nome -> indice combo
     }
+
+
+# ---------- batch su più modelli ----------
+def _solve_one(job: tuple[str, dict]) -> dict:
+    model_path, kwargs = job
+    try:
+        return lsa_combine_and_solve(model_path, uID=1, **kwargs)
+    finally:
+        St7Release()  # ogni processo ha la propria sessione API
+
+def lsa_combine_and_solve_many(model_paths, max_workers: int | None = None, **kwargs) -> list[dict]:
+    """
+    Esegue lsa_combine_and_solve su più file .st7 indipendenti, un processo per modello
+    (gli uID St7 sono per-processo, quindi ognuno usa uID=1).
+    kwargs : stessi argomenti di lsa_combine_and_solve (freedom_case, lc_*, combos)
+    Ritorna i risultati nello stesso ordine di model_paths.
+    """
+    jobs = [(p, kwargs) for p in model_paths]
+    if max_workers == 1 or len(jobs) <= 1:
+        return [_solve_one(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        return list(ex.map(_solve_one, jobs))
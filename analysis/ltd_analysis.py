@@ -13,11 +13,32 @@ def ck(err, msg):                                   # Check errori API
     if err != 0:                                    # 0 = OK
         raise RuntimeError(f"{msg} (St7 err={err})")# Eccezione con codice
 
+# API opzionali: risolte una volta all'import (funzione o None se il wrapper non la espone)
+_OPT_API = {name: getattr(st7, name, None) for name in (
+    "St7SetUseSolverDLL", "St7SetLTAMethod", "St7SetLTASolutionType",
+    "St7SetTransientInitialConditionsType", "St7SetSolverDefaultsLogical")}
+
+def _opt(name, *args):                              # Chiamata API opzionale
+    fn = _OPT_API[name]                             # Nessun getattr per chiamata
+    if fn is None:                                  # Non esposta dal wrapper
+        return False
+    try:
+        return fn(*args) == 0                       # True se OK
+    except (ct.ArgumentError, OSError):             # Firma/DLL: opzione saltata come prima
+        return False
+
+# Preset LTD fisso: costanti lette una volta sola
+_LTD_METHOD = st7.ltNewmark                         # 1) Metodo tempo: Newmark
+_LTD_SOLUTION = st7.stFullSystem                    # 2) Solution type: Full System
+_LTD_IC = st7.icNone                                # 3) Condizioni iniziali: none
+
+_BASE_VEC_X = (ct.c_double * 3)(1.0, 0.0, 0.0)     # Direzione X, allocata una volta
+
 def _resolve_acc_table_id(uID, acc_table):          # Accetta ID int o nome str
     if isinstance(acc_table, int):                  # Se è già un ID
         return int(acc_table)                       # Ritorna l’ID
-    TableID = ct.c_long(0)                          # Alloca out param
     name_b = str(acc_table).encode("utf-8")         # Nome in bytes
+    TableID = ct.c_long(0)                          # Alloca out param
     # Nota: il wrapper vuole un int puro per TableType
     ck(st7.St7GetTableID(uID, int(st7.ttAccVsTime), name_b, ct.byref(TableID)),
        f"St7GetTableID('{acc_table}')")             # Lookup per nome
@@ -25,46 +46,45 @@ def _resolve_acc_table_id(uID, acc_table):          # Accetta ID int o nome str
 
 # ---- Configurazione e run LTD ---------------------------------------------
 
-def run_LTD(uID, acc_table_name="acc1"):            # Funzione principale LTD
+def _setup_ltd(uID, base_excitation):               # Passi comuni globale/locale
     # 0) Solver DLL (integrazione in-process)
-    try:                                            # Alcuni wrapper non la espongono
-        ck(st7.St7SetUseSolverDLL(st7.btTrue), "Use solver DLL")  # Preferisci DLL
-    except Exception:                                # Se non disponibile
-        pass                                         # Continua
-
-    # 1) Metodo tempo: Newmark
-    try:                                            # API dedicata
-        ck(st7.St7SetLTAMethod(uID, st7.ltNewmark), "Set Newmark")  # Newmark
-    except Exception:                                # Se assente
-        pass                                         # Usa default
-
-    # 2) Solution type: Full System
-    set_full_ok = False                              # Flag locale
-    try:                                            # API specifica
-        ck(st7.St7SetLTASolutionType(uID, st7.stFullSystem), "Set FullSystem")  # FullSystem
-        set_full_ok = True                           # Impostato
-    except Exception:                                # Fallback
-        try:
-            ck(st7.St7SetSolverDefaultsLogical(uID, st7.spFullSystemTransient, st7.btTrue),
-               "Force FullSystem via defaults")      # Forza FullSystem
-            set_full_ok = True                       # Impostato
-        except Exception:
-            pass                                     # Continua
+    _opt("St7SetUseSolverDLL", st7.btTrue)           # Preferisci DLL se esposta
+
+    # 1) Metodo tempo: Newmark (opzionale)
+    _opt("St7SetLTAMethod", uID, _LTD_METHOD)
+
+    # 2) Solution type: Full System, altrimenti fallback via defaults
+    set_full_ok = (_opt("St7SetLTASolutionType", uID, _LTD_SOLUTION)
+                   or _opt("St7SetSolverDefaultsLogical", uID,
+                           st7.spFullSystemTransient, st7.btTrue))
     if not set_full_ok:                              # Se non impostato
         print("ATTENZIONE: Full System non impostato esplicitamente.")  # Avviso
 
-    # 3) Condizioni iniziali: none
-    try:                                            # Opzionale
-        ck(st7.St7SetTransientInitialConditionsType(uID, st7.icNone), "Set IC none")  # icNone
-    except Exception:
-        pass
+    # 3) Condizioni iniziali: none (opzionale)
+    _opt("St7SetTransientInitialConditionsType", uID, _LTD_IC)
 
-    # 4) Base excitation = Acceleration
-    ck(st7.St7SetTransientBaseExcitation(uID, st7.beAcceleration), "Base = acceleration")  # beAcceleration
+    # 4) Base excitation (beAcceleration globale, beNone locale)
+    ck(st7.St7SetTransientBaseExcitation(uID, base_excitation), "Base excitation")
+
+def _solve_ltd(uID, save_every=1):                  # Time stepping + solver
+    # Time stepping: uID, Row, NumSteps, SaveEvery, TimeStep
+    ck(st7.St7SetTimeStepUnit(uID, st7.tuSec), "Time unit = sec")     # tuSec
+    ck(st7.St7SetTimeStepData(uID, 1, 250, save_every, 0.1),
+       "Time step data")
+
+    # Massa beam consistente
+    _opt("St7SetSolverDefaultsLogical", uID, st7.spLumpedMassBeam, st7.btFalse)  # No lumped
+
+    # Avvio solver LTD (firma a 4 argomenti)
+    ck(st7.St7RunSolver(uID, st7.stLinearTransientDynamic, st7.smBackgroundRun, st7.btTrue),
+       "Run LTD")                                                      # Esegui e attendi
+
+def run_LTD(uID, acc_table_name="acc1", save_every=1):  # Funzione principale LTD
+    # 0-4) Solver, Newmark, FullSystem, IC none, base = accelerazione
+    _setup_ltd(uID, st7.beAcceleration)
 
     # 5) Base vector (1,0,0)
-    base_vec = (ct.c_double * 3)(1.0, 0.0, 0.0)     # Array double[3]
-    ck(st7.St7SetTransientBaseVector(uID, base_vec), "Base vector (1,0,0)")  # Direzione X
+    ck(st7.St7SetTransientBaseVector(uID, _BASE_VEC_X), "Base vector (1,0,0)")  # Direzione X
 
     # 6) Tabella Acceleration vs Time su X (ID o nome)
     acc_id = _resolve_acc_table_id(uID, acc_table_name)               # Risolvi ID
@@ -72,21 +92,8 @@ def run_LTD(uID, acc_table_name="acc1"):            # Funzione principale LTD
     ck(st7.St7SetTransientBaseTables(uID, st7.beAcceleration, tabs),  # Associa tabelle
        "Bind base tables")
 
-    # 7) Time stepping: uID, Row, NumSteps, SaveEvery, TimeStep
-    ck(st7.St7SetTimeStepUnit(uID, st7.tuSec), "Time unit = sec")     # tuSec
-    ck(st7.St7SetTimeStepData(uID, 1, 250, 1, ct.c_double(0.1)),
-       "Time step data")
-
-    # 8) Massa beam consistente
-    try:                                                               # Opzione solver
-        ck(st7.St7SetSolverDefaultsLogical(uID, st7.spLumpedMassBeam, st7.btFalse),
-           "Beam mass consistent")                                     # No lumped
-    except Exception:
-        pass
-
-    # 9) Avvio solver LTD (firma a 4 argomenti)
-    ck(st7.St7RunSolver(uID, st7.stLinearTransientDynamic, st7.smBackgroundRun, st7.btTrue),
-       "Run LTD")                                                      # Esegui e attendi
+    # 7-9) Time stepping, massa consistente, solver
+    _solve_ltd(uID, save_every)
 
 # ---- Esecuzione diretta opzionale -----------------------------------------
 
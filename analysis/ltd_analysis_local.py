@@ -7,19 +7,25 @@ import sys	# Per argv se lanciato diretto
 # Import API Straus7
 import St7API as st7	# Wrapper ufficiale
 
+# Passi comuni con l'LTD globale (setup solver, time stepping, run)
+try:
+	from analysis.ltd_analysis import ck, _setup_ltd, _solve_ltd
+except ImportError:	# lanciato da dentro analysis/
+	from ltd_analysis import ck, _setup_ltd, _solve_ltd
+
 # ---- Utility ---------------------------------------------------------------
 
-def ck(err, msg):	# Check errori API
-	if err != 0:	# 0 = OK
-		raise RuntimeError(f"{msg} (St7 err={err})")# Eccezione con codice
+# Out-param riusati a ogni chiamata (sovrascritti dall'API)
+_NAME_BUF = ct.create_string_buffer(st7.kMaxStrLen)	# Nome Freedom Case
+_NUM_FC = ct.c_long(0)	# Numero Freedom Case
 
 def _resolve_fvt_table_id(uID, table_name):	# Accetta ID int o nome str
 	"""Risolve l'ID di una tabella Factor vs Time dal suo nome."""
 	if isinstance(table_name, int):	# Se è già un ID
 		return int(table_name)	# Ritorna l’ID
 	
-	TableID = ct.c_long(0)	# Alloca out param
 	name_b = str(table_name).encode("utf-8")	# Nome in bytes
+	TableID = ct.c_long(0)	# Alloca out param
 	
 	# Cerca una tabella di tipo Factor vs Time
 	ck(st7.St7GetTableID(uID, int(st7.ttFactorVsTime), name_b, ct.byref(TableID)),
@@ -32,102 +38,65 @@ def _resolve_fvt_table_id(uID, table_name):	# Accetta ID int o nome str
 
 # ---- Configurazione e run LTD (Modello Locale) ----------------------------
 
-def run_LTD_local(uID):	# Funzione principale LTD locale
-	# 0) Solver DLL (integrazione in-process)
-	try:
-		ck(st7.St7SetUseSolverDLL(st7.btTrue), "Use solver DLL")
-	except Exception:
-		pass
-
-	# 1) Metodo tempo: Newmark
-	try:
-		ck(st7.St7SetLTAMethod(uID, st7.ltNewmark), "Set Newmark")
-	except Exception:
-		pass
-
-	# 2) Solution type: Full System
-	set_full_ok = False
-	try:
-		ck(st7.St7SetLTASolutionType(uID, st7.stFullSystem), "Set FullSystem")
-		set_full_ok = True
-	except Exception:
-		try:
-			ck(st7.St7SetSolverDefaultsLogical(uID, st7.spFullSystemTransient, st7.btTrue),
-				"Force FullSystem via defaults")
-			set_full_ok = True
-		except Exception:
-			pass
-	if not set_full_ok:
-		print("ATTENZIONE: Full System non impostato esplicitamente.")
-
-	# 3) Condizioni iniziali: none
-	try:
-		ck(st7.St7SetTransientInitialConditionsType(uID, st7.icNone), "Set IC none")
-	except Exception:
-		pass
-
-	# 4) Base excitation = None (come richiesto)
-	ck(st7.St7SetTransientBaseExcitation(uID, st7.beNone), "Base = None")
+def run_LTD_local(uID, verbose=True):	# Funzione principale LTD locale
+	"""verbose=False sopprime il dettaglio per Freedom Case (avvisi ed errori restano)."""
+	# 0-4) Solver, Newmark, FullSystem, IC none, base excitation = None
+	_setup_ltd(uID, st7.beNone)
 
 	# 5) Associa tabelle Factor vs Time ai Freedom Cases
 	# Si assume che il nome del Freedom Case corrisponda al nome della tabella FvT
 	print("Associazione tabelle Factor vs Time ai Freedom Cases...")
-	num_fc = ct.c_long(0)
+	num_fc = _NUM_FC
+	num_fc.value = 0
 	ck(st7.St7GetNumFreedomCase(uID, ct.byref(num_fc)), "Get Num Freedom Cases")
 	
 	if num_fc.value == 0:
 		print("ATTENZIONE: Nessun Freedom Case trovato nel modello.")
 	
-	for i in range(1, num_fc.value + 1):
-		CaseNum = i
-		CaseName = ct.create_string_buffer(st7.kMaxStr) # Alloca buffer
-		ck(st7.St7GetFreedomCaseName(uID, CaseNum, CaseName), f"Get FC Name ({CaseNum})")
-		
-		fc_name = CaseName.value.decode('utf-8')
-		if not fc_name:
-			print(f"ATTENZIONE: Freedom Case {CaseNum} non ha nome. Impossibile associare tabella.")
-			continue
-
-		try:
-			# Il nome del FC è uguale al nome della tabella FvT
-			table_name = fc_name
-			print(f"  - Freedom Case {CaseNum} ('{fc_name}'):")
+	# Messaggi del loop accumulati e scritti in un'unica volta a fine associazione
+	log = []
+	info = log.append if verbose else (lambda _msg: None)
+	get_fc_name = st7.St7GetFreedomCaseName	# handle ctypes diretti, risolti fuori dal loop
+	set_fc_table = st7.St7SetTransientFreedomTimeTable
+	try:
+		for i in range(1, num_fc.value + 1):
+			CaseNum = i
+			ck(get_fc_name(uID, CaseNum, _NAME_BUF, st7.kMaxStrLen), f"Get FC Name ({CaseNum})")
 			
-			# 5.1) Risolvi ID tabella FvT
-			table_id = _resolve_fvt_table_id(uID, table_name)
-			print(f"    -> Trovata tabella '{table_name}' (ID={table_id})")
-
-			# 5.2) Applica la tabella al Freedom Case
-			# Non aggiungere time steps dalla tabella (usa quelli globali)
-			add_steps = st7.btFalse 
-			ck(st7.St7SetTransientFreedomTimeTable(uID, CaseNum, table_id, add_steps),
-				f"SetTransientFreedomTimeTable for FC {CaseNum} ('{fc_name}')")
-			print(f"    -> Associata al Freedom Case {CaseNum}.")
-
-		except Exception as e:
-			print(f"ERRORE nell'associare FC {CaseNum} ('{fc_name}'): {e}")
-			# Continua con gli altri FC anche se uno fallisce
-			pass
+			fc_name = _NAME_BUF.value.decode('utf-8')
+			if not fc_name:
+				log.append(f"ATTENZIONE: Freedom Case {CaseNum} non ha nome. Impossibile associare tabella.")
+				continue
+
+			try:
+				# Il nome del FC è uguale al nome della tabella FvT
+				table_name = fc_name
+				info(f"  - Freedom Case {CaseNum} ('{fc_name}'):")
+				
+				# 5.1) Risolvi ID tabella FvT
+				table_id = _resolve_fvt_table_id(uID, table_name)
+				info(f"    -> Trovata tabella '{table_name}' (ID={table_id})")
+
+				# 5.2) Applica la tabella al Freedom Case
+				# Non aggiungere time steps dalla tabella (usa quelli globali)
+				add_steps = st7.btFalse 
+				ck(set_fc_table(uID, CaseNum, table_id, add_steps),
+					f"SetTransientFreedomTimeTable for FC {CaseNum} ('{fc_name}')")
+				info(f"    -> Associata al Freedom Case {CaseNum}.")
+
+			except Exception as e:
+				log.append(f"ERRORE nell'associare FC {CaseNum} ('{fc_name}'): {e}")
+				# Continua con gli altri FC anche se uno fallisce
+				pass
+	finally:
+		if log:
+			sys.stdout.write("\n".join(log) + "\n")
 	
 	print("Associazione tabelle completata.")
 
-	# 6) Time stepping: uID, Row, NumSteps, SaveEvery, TimeStep
-	# (Uguale all'analisi globale, come richiesto)
-	ck(st7.St7SetTimeStepUnit(uID, st7.tuSec), "Time unit = sec")
-	ck(st7.St7SetTimeStepData(uID, 1, 250, 1, ct.c_double(0.1)),
-		"Time step data")
-
-	# 7) Massa beam consistente
-	try:
-		ck(st7.St7SetSolverDefaultsLogical(uID, st7.spLumpedMassBeam, st7.btFalse),
-			"Beam mass consistent")
-	except Exception:
-		pass
-
-	# 8) Avvio solver LTD (firma a 4 argomenti)
+	# 6-8) Time stepping (uguale all'analisi globale), massa consistente, solver
 	print("Avvio solver Linear Transient Dynamic...")
-	ck(st7.St7RunSolver(uID, st7.stLinearTransientDynamic, st7.smBackgroundRun, st7.btTrue),
-		"Run LTD")
+	_solve_ltd(uID)
 	print("Solver completato.")
 
 # ---- Esecuzione diretta opzionale -----------------------------------------
@@ -3,10 +3,22 @@ import os, ctypes
 import St7API as st
 import glob
 import math
+import hashlib
+import shutil
+from functools import lru_cache
+import numpy as np
 
 
 KMAX = st.kMaxStrLen
 
+@lru_cache(maxsize=32)
+def _path_b(path: str) -> bytes:
+    """Percorso assoluto → bytes per l'API, codificato una volta sola per percorso."""
+    return path.encode()
+
+def _abs_b(path: str) -> bytes:
+    return _path_b(os.path.abspath(path))
+
 def _api_err(ierr):
     if ierr == st.ERR7_NoError:
         return
@@ -14,10 +26,37 @@ def _api_err(ierr):
     st.St7GetAPIErrorString(ierr, buf, KMAX)
     raise RuntimeError(buf.value.decode("utf-8", errors="ignore"))
 
-def _get_modal_freqs(uID: int, nfa_path: str) -> list[float]:
-    """Legge le frequenze [Hz] dal file .nfa."""
-    nfa_abs = os.path.abspath(nfa_path).encode()
+# Record restituito da get_modal_freqs_periods: (mode, freq_Hz, period_s)
+MODE_DTYPE = np.dtype([("mode", np.int64), ("freq", np.float64), ("period", np.float64)])
+
+_IP_FREQ = st.ipFrequencyNFA                            # indice frequenza in ModalResult
+_K_NOCOMB = getattr(st, "kNoCombinations", 0)           # nessuna combinazione
+# indici nel vettore RayleighFactors[0..5]
+_IP_R_F1 = st.ipRayleighF1
+_IP_R_F2 = st.ipRayleighF2
+_IP_R_DF1 = st.ipRayleighDisplayF1
+_IP_R_DF2 = st.ipRayleighDisplayF2
+_MODAL_BUF = (ctypes.c_double * 16)()                   # ModalResult[0..15], riusato tra chiamate
+
+def _nfa_freqs(uID: int, n_modes: int) -> np.ndarray:
+    """Frequenze [Hz] dei modi 1..n_modes dall'NFA corrente (un solo buffer, un solo loop)."""
+    get_nfa = st.St7GetModalResultsNFA                  # lookup fuori dal loop
+    i_f = _IP_FREQ
+    dbl = _MODAL_BUF
+    freqs = np.empty(n_modes, dtype=np.float64)
+    for k in range(1, n_modes + 1):
+        _api_err(get_nfa(uID, k, dbl))                  # firma: (uID, Mode, ModalResult*)
+        freqs[k - 1] = dbl[i_f]
+    return freqs
+
+def _periods(freqs: np.ndarray) -> np.ndarray:
+    """T = 1/f, inf per frequenze nulle o negative."""
+    T = np.full_like(freqs, np.inf)
+    np.reciprocal(freqs, out=T, where=freqs > 0.0)
+    return T
 
+def _read_nfa(uID: int, nfa_abs: bytes) -> np.ndarray:
+    """Apre l'NFA come result file corrente, legge tutte le frequenze [Hz] e lo richiude."""
     # numero modi nel file
     n_modes = ctypes.c_long()
     _api_err(st.St7GetNumModesInNFAFile(uID, nfa_abs, ctypes.byref(n_modes)))
@@ -27,70 +66,97 @@ def _get_modal_freqs(uID: int, nfa_path: str) -> list[float]:
     try:
         numP = ctypes.c_long()                                   # out: num. primary cases
         numS = ctypes.c_long()                                   # out: num. secondary cases
-        comb = getattr(st, "kNoCombinations", 0)                 # nessuna combinazione
         _api_err(st.St7OpenResultFile(uID, nfa_abs, b"",         # FileName, SpectralName=""
-                                    comb,                      # CombinationCode
+                                    _K_NOCOMB,                 # CombinationCode
                                     ctypes.byref(numP),
                                     ctypes.byref(numS)))       # out params
         opened = True
     except AttributeError:
         pass
 
+    try:
+        return _nfa_freqs(uID, n_modes.value)
+    finally:
+        if opened:
+            try:
+                st.St7CloseResultFile(uID)
+            except Exception:
+                pass
 
-    freqs = []
-    dbl = (ctypes.c_double * 16)()  # ModalResult[0..15]
-    for k in range(1, n_modes.value + 1):
-        _api_err(st.St7GetModalResultsNFA(uID, k, dbl))  # firma: (uID, Mode, ModalResult*)
-        freqs.append(float(dbl[st.ipFrequencyNFA]))
-
-    if opened:
-        try:
-            _api_err(st.St7CloseResultFile(uID))
-        except Exception:
-            pass
-
-    return freqs
-
-def run_modal_analysis(model_path, scratch_path, n_modes=10, res_path=None, log_path=None):
+def _get_modal_freqs(uID: int, nfa_path: str) -> list[float]:
+    """Legge le frequenze [Hz] dal file .nfa."""
+    return _read_nfa(uID, _abs_b(nfa_path)).tolist()
+
+def _nfa_cache_key(model_path: str, n_modes: int) -> str:
+    """Hash del file .st7 + impostazioni del solver modale: identifica un .nfa riutilizzabile."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(model_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    h.update(repr(("nfa-v1", int(n_modes), 0.0, 500)).encode())   # modi, shift, MaxIterationEig
+    return h.hexdigest()
+
+def run_modal_analysis(model_path, scratch_path, n_modes=10, res_path=None, log_path=None,
+                       cache_dir=None):
+    """
+    Lancia il solver Natural Frequency sul modello.
+    cache_dir : se indicata (con res_path), riusa il .nfa di una run precedente sullo stesso
+                modello con gli stessi parametri, saltando il solver; altrimenti ve lo salva.
+    """
     # risolvi percorsi e precondizioni
     model_path = os.path.abspath(model_path)
     scratch_path = os.path.abspath(scratch_path)
+    res_path = os.path.abspath(res_path) if res_path else None    # risolto una volta sola
     if not os.path.isfile(model_path):
         raise FileNotFoundError(f"ST7 non trovato: {model_path}")
     os.makedirs(scratch_path, exist_ok=True)
 
+    # memo persistente: stesso .st7 + stessi parametri → stesso .nfa
+    cached = None
+    if cache_dir and res_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        cached = os.path.join(os.path.abspath(cache_dir), _nfa_cache_key(model_path, n_modes) + ".nfa")
+        if os.path.isfile(cached):
+            shutil.copyfile(cached, res_path)
+            print(f"Risultati modali da cache: {cached}")
+            return
+    # path risultati pronti prima del solver: la lettura post-solve non rifà abspath/encode
+    res_b = _path_b(res_path) if res_path else None
+    n_found = ctypes.c_long()
+
     _api_err(st.St7Init())
     uID = 1
     try:
-        _api_err(st.St7OpenFile(uID, model_path.encode(), scratch_path.encode()))  # :contentReference[oaicite:0]{index=0}
+        _api_err(st.St7OpenFile(uID, _path_b(model_path), _path_b(scratch_path)))  # :contentReference[oaicite:0]{index=0}
 
         if res_path:
-            _api_err(st.St7SetResultFileName(uID, os.path.abspath(res_path).encode()))       # :contentReference[oaicite:1]{index=1}
+            _api_err(st.St7SetResultFileName(uID, res_b))                                     # :contentReference[oaicite:1]{index=1}
         if log_path:
-            _api_err(st.St7SetResultLogFileName(uID, os.path.abspath(log_path).encode()))    # :contentReference[oaicite:2]{index=2}
+            _api_err(st.St7SetResultLogFileName(uID, _abs_b(log_path)))                      # :contentReference[oaicite:2]{index=2}
 
         # >>> configurazione solver robusta per analisi modale
-        # azzera eventuale shift di frequenza
-        _api_err(st.St7SetNFAShift(uID, 0.0))
-        _api_err(st.St7SetSolverDefaultsDouble(uID, st.spFrequencyShift, 0.0))
-
-        # forza espansione del working set per ottenere tutti i modi richiesti
-        _api_err(st.St7SetSolverDefaultsLogical(uID, st.spAutoWorkingSet, True))
-        _api_err(st.St7SetSolverDefaultsInteger(uID, st.spExpandWorkingSet, max(10, 2 * int(n_modes))))
-        _api_err(st.St7SetSolverDefaultsInteger(uID, st.spMaxIterationEig, 500))
-        _api_err(st.St7SetSolverDefaultsLogical(uID, st.spCheckEigenvector, True))
-        _api_err(st.St7SetSturmCheck(uID, True))
-
-        # Natural Frequency settings
-        _api_err(st.St7SetSolverDefaultsInteger(uID, st.spNumFrequency, int(n_modes)))  # forza il numero di modi
-        _api_err(st.St7SetNFANumModes(uID, int(n_modes)))                               # ridondante ma sicuro
-        _api_err(st.St7SetSturmCheck(uID, True))                                        # opzionale
+        n = int(n_modes)
+        set_i = st.St7SetSolverDefaultsInteger
+        set_l = st.St7SetSolverDefaultsLogical
+        set_d = st.St7SetSolverDefaultsDouble
+        err = _api_err
+        for setter, key, value in (
+            (set_d, st.spFrequencyShift, 0.0),             # azzera eventuale shift di frequenza
+            (set_l, st.spAutoWorkingSet, True),            # espansione del working set per
+            (set_i, st.spExpandWorkingSet, max(10, 2 * n)),  # ottenere tutti i modi richiesti
+            (set_i, st.spMaxIterationEig, 500),
+            (set_l, st.spCheckEigenvector, True),
+            (set_i, st.spNumFrequency, n),                 # forza il numero di modi
+        ):
+            err(setter(uID, key, value))
+        err(st.St7SetNFAShift(uID, 0.0))
+        err(st.St7SetNFANumModes(uID, n))                   # ridondante ma sicuro
+        err(st.St7SetSturmCheck(uID, True))                 # una sola volta (prima era ripetuta)
 
         # >>> diagnostica: stampa verifica del parametro interno del solver
-        tmp = ctypes.c_long()
-        _api_err(st.St7GetSolverDefaultsInteger(uID, st.spNumFrequency, ctypes.byref(tmp)))
+        _api_err(st.St7GetSolverDefaultsInteger(uID, st.spNumFrequency, ctypes.byref(n_found)))
         # stampa numero modi impostato ridonadante perchè viene stampato dopo il solver ma può tornare utile se ci sono errori
-        #print(f"Numero modi impostato (spNumFrequency) = {tmp.value}")
+        #print(f"Numero modi impostato (spNumFrequency) = {n_found.value}")
 
         # Partecipazioni di massa
         _api_err(st.St7SetNFAModeParticipationCalculate(uID, True))
@@ -106,14 +172,17 @@ def run_modal_analysis(model_path, scratch_path, n_modes=10, res_path=None, log_
 
         # >>> dopo il solver, verifica quanti modi sono stati effettivamente salvati nel file .nfa
         if res_path:
-            n_found = ctypes.c_long()
-            _api_err(st.St7GetNumModesInNFAFile(uID, os.path.abspath(res_path).encode(), ctypes.byref(n_found)))
+            n_found.value = 0
+            _api_err(st.St7GetNumModesInNFAFile(uID, res_b, ctypes.byref(n_found)))
             print(f"Modi trovati nel file NFA: {n_found.value} (richiesti: {n_modes})")
 
     finally:
         st.St7CloseFile(uID)                                                                   # :contentReference[oaicite:9]{index=9}
         st.St7Release()
 
+    if cached and os.path.isfile(res_path):
+        shutil.copyfile(res_path, cached)                                                      # per le run successive
+
 def default_model_path(base_dir, name_without_ext):
     """Costruisce il path al .st7 affiancato agli script."""
     return os.path.join(os.path.abspath(base_dir), f"{name_without_ext}.st7")
@@ -125,47 +194,27 @@ def find_model_in(base_dir):
         raise FileNotFoundError(f"Attesi 1 file .st7, trovati {len(cand)} in {base_dir}")
     return cand[0]
 
-def get_modal_freqs_periods(uID: int, nfa_path: str):
-    """Ritorna [(mode, freq_Hz, period_s), ...] dal file .nfa."""
-    nfa_abs = os.path.abspath(nfa_path).encode()
-
-    # Quanti modi nel file
-    n_modes = ctypes.c_long()
-    _api_err(st.St7GetNumModesInNFAFile(uID, nfa_abs, ctypes.byref(n_modes)))
-
-    # imposta l'NFA come result file corrente
-    opened = False
-    try:
-        numP = ctypes.c_long()
-        numS = ctypes.c_long()
-        comb = getattr(st, "kNoCombinations", 0)  # nessuna combinazione
-        _api_err(st.St7OpenResultFile(
-            uID, nfa_abs, b"", comb, ctypes.byref(numP), ctypes.byref(numS)
-        ))
-        opened = True
-    except AttributeError:
-        pass
-
-    out = []
-    dbl = (ctypes.c_double * 16)()              # [0..15] come da manuale
-    for k in range(1, n_modes.value + 1):
-        _api_err(st.St7GetModalResultsNFA(uID, k, dbl))  # firma corretta: (uID, Mode, ModalResult*)
-        f = float(dbl[st.ipFrequencyNFA])       # Hz
-        T = (1.0 / f) if f > 0.0 else float("inf")
-        out.append((k, f, T))
-
-    if opened:
-        try:
-            st.St7CloseResultFile(uID)
-        except Exception:
-            pass
-
+def _format_modes(freqs: np.ndarray, periods: np.ndarray) -> str:
+    """Tabella 'Mode i  freq = ... Hz  period = ... s' come unica stringa (una sola print)."""
+    return "\n".join(
+        f"Mode {k:>2}  freq = {f:.6g} Hz   period = {T:.6g} s"
+        for k, (f, T) in enumerate(zip(freqs.tolist(), periods.tolist()), start=1)
+    )
+
+def get_modal_freqs_periods(uID: int, nfa_path: str) -> np.ndarray:
+    """Ritorna un array MODE_DTYPE di record (mode, freq_Hz, period_s) dal file .nfa."""
+    freqs = _read_nfa(uID, _abs_b(nfa_path))     # Hz
+    out = np.empty(freqs.size, dtype=MODE_DTYPE)
+    out["mode"] = np.arange(1, freqs.size + 1)
+    out["freq"] = freqs
+    out["period"] = _periods(freqs)
     return out
 
 def print_modal_freqs_periods(uID: int, nfa_path: str):
     """Stampa 'Mode i  freq = ... Hz  period = ... s' per ogni modo nel .nfa."""
-    for k, f, T in get_modal_freqs_periods(uID, nfa_path):
-        print(f"Mode {k:>2}  freq = {f:.6g} Hz   period = {T:.6g} s")
+    modes = get_modal_freqs_periods(uID, nfa_path)
+    if modes.size:
+        print(_format_modes(modes["freq"], modes["period"]))
 
 # --- Rayleigh dai risultati modali (NFA) ------------------------------------
 def set_rayleigh_from_nfa(uID: int, nfa_path: str):
@@ -175,51 +224,31 @@ def set_rayleigh_from_nfa(uID: int, nfa_path: str):
       F1=fmin, F2=fmax, DisplayF1=fmin, DisplayF2=fmax.
     Ritorna (fmin, fmax).
     """
-    nfa_abs = os.path.abspath(nfa_path).encode()
-
-    # Apri il result file (firma a 6 argomenti)
-    numP = ct.c_long(0)
-    numS = ct.c_long(0)
-    kNoComb = getattr(st, "kNoCombinations", 0)
-    _api_err(st.St7OpenResultFile(uID, nfa_abs, b"", kNoComb, ct.byref(numP), ct.byref(numS)))  # :contentReference[oaicite:1]{index=1}
-
-    # Quanti modi
-    n_modes = ct.c_long()
-    _api_err(st.St7GetNumModesInNFAFile(uID, nfa_abs, ct.byref(n_modes)))
-
-    # Loop modi: serve che il result file sia "corrente"
-    dbl = (ct.c_double * 16)()
-    freqs = []
-    for k in range(1, n_modes.value + 1):
-        _api_err(st.St7GetModalResultsNFA(uID, k, dbl))  # firma a 3 argomenti; legge dall'NFA aperto
-        f = float(dbl[getattr(st, "ipFrequencyNFA")])    # Hz
-        T = (1.0 / f) if f > 0 else float("inf")
-        print(f"Mode {k:>2}  freq = {f:.6g} Hz   period = {T:.6g} s")
-        freqs.append(f)
-
-    if not freqs:
+    freqs = _read_nfa(uID, _abs_b(nfa_path))     # Hz
+    if not freqs.size:
         raise RuntimeError("Nessuna frequenza trovata nell'NFA.")
+    print(_format_modes(freqs, _periods(freqs)))
 
-    fmin = min(freqs)
-    fmax = max(freqs)
+    fmin = float(freqs.min())
+    fmax = float(freqs.max())
 
     # Abilita Rayleigh come tipo di smorzamento e imposta F1/F2 + display
     _api_err(st.St7SetDampingType(uID, st.dtRayleighDamping))  # :contentReference[oaicite:2]{index=2}
-    arr = (ct.c_double * 6)(0, 0, 0, 0, 0, 0)
-    arr[getattr(st, "ipRayleighF1")]        = fmin
-    arr[getattr(st, "ipRayleighF2")]        = fmax
-    arr[getattr(st, "ipRayleighDisplayF1")] = fmin
-    arr[getattr(st, "ipRayleighDisplayF2")] = fmax
+    arr = (ctypes.c_double * 6)(0, 0, 0, 0, 0, 0)
+    arr[_IP_R_F1]  = fmin
+    arr[_IP_R_F2]  = fmax
+    arr[_IP_R_DF1] = fmin
+    arr[_IP_R_DF2] = fmax
     _api_err(st.St7SetRayleighFactors(uID, st.rmSetFrequencies, arr))        # :contentReference[oaicite:3]{index=3}
 
     # Facoltativo: rilettura e echo dei parametri impostati
-    mode_out = ct.c_long()
-    back = (ct.c_double * 6)()
-    _api_err(st.St7GetRayleighFactors(uID, ct.byref(mode_out), back))        # :contentReference[oaicite:4]{index=4}
-    print(f"Rayleigh set: F1={back[getattr(st,'ipRayleighF1')]:.6g} Hz  "
-          f"F2={back[getattr(st,'ipRayleighF2')]:.6g} Hz  "
-          f"DispF1={back[getattr(st,'ipRayleighDisplayF1')]:.6g}  "
-          f"DispF2={back[getattr(st,'ipRayleighDisplayF2')]:.6g}")
+    mode_out = ctypes.c_long()
+    back = (ctypes.c_double * 6)()
+    _api_err(st.St7GetRayleighFactors(uID, ctypes.byref(mode_out), back))        # :contentReference[oaicite:4]{index=4}
+    print(f"Rayleigh set: F1={back[_IP_R_F1]:.6g} Hz  "
+          f"F2={back[_IP_R_F2]:.6g} Hz  "
+          f"DispF1={back[_IP_R_DF1]:.6g}  "
+          f"DispF2={back[_IP_R_DF2]:.6g}")
 
     return fmin, fmax
 
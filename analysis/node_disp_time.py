@@ -1,10 +1,14 @@
 # analysis/node_disp_time.py
-# (Questo file è CORRETTO. Il problema è nel main.py)
+# Unica versione del modulo (export DX, DY, RZ): importare sempre come
+#   from analysis.node_disp_time import find_node, export_ltd_node_displacements
 
 import os
+import copy
+import contextlib
 import glob
-import math
 import ctypes as C
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import St7API as st7
 
 # ------------------------- utilità API di base -------------------------
@@ -23,87 +27,138 @@ def _close(uID: int) -> None:
     """Chiude il modello associato all'unit ID dato."""
     _ck(st7.St7CloseFile(uID), "St7CloseFile")
 
+@contextlib.contextmanager
+def straus7_open(model_path: str, uID: int = 1, save: bool = False):
+    """
+    Sessione API unica sul modello: St7Init + St7OpenFile all'ingresso,
+    St7CloseFile + St7Release all'uscita. Restituisce l'uID da passare a
+    find_node / export_ltd_node_displacements (o alle funzioni con opened=True,
+    es. apply_load_cases / import_spettro.run) per evitare aperture ripetute.
+    save=True: St7SaveFile prima della chiusura se il blocco termina senza errori.
+    """
+    _ck(st7.St7Init(), "St7Init")
+    try:
+        _open(uID, model_path)
+        try:
+            yield uID
+            if save:
+                _ck(st7.St7SaveFile(uID), "St7SaveFile")
+        finally:
+            _close(uID)
+    finally:
+        _ck(st7.St7Release(), "St7Release")
+
 def _total_nodes(uID: int) -> int:
     """Ritorna il numero totale di nodi nel modello."""
     tot = C.c_long()
     _ck(st7.St7GetTotal(uID, st7.tyNODE, C.byref(tot)), "St7GetTotal tyNODE")
     return tot.value
 
+_XYZ_BUF = (C.c_double * 3)()    # out-param XYZ riusato (i valori vengono copiati subito)
+
 def _xyz(uID: int, node_num: int) -> tuple[float, float, float]:
     """Ritorna le coordinate (X,Y,Z) di un nodo."""
-    arr = (C.c_double * 3)()
+    arr = _XYZ_BUF
     _ck(st7.St7GetNodeXYZ(uID, node_num, arr), f"St7GetNodeXYZ {node_num}")
     return arr[0], arr[1], arr[2]
 
-def _dist3(a: tuple[float, float, float], b: tuple[float, float, float]) -> float:
-    """Distanza euclidea 3D."""
-    return math.sqrt((a[0]-b[0])**2 + (a[1]-b[1])**2 + (a[2]-b[2])**2)
+def _all_xyz(uID: int, N: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Coordinate dei nodi 1..N senza tuple intermedie: un solo buffer double[3] riusato,
+    copiato nella colonna del nodo. Layout SoA: X, Y, Z sono tre righe contigue di un
+    array (3,N); xyz restituito è la sua trasposta (N,3), quindi xyz[:, k] è contiguo.
+    Ritorna (id_nodi, xyz) dei soli nodi letti senza errore.
+    """
+    cols = np.empty((3, N), dtype=np.float64)
+    ok = np.ones(N, dtype=bool)
+    arr = _XYZ_BUF
+    get_xyz = st7.St7GetNodeXYZ
+    for i in range(N):
+        if get_xyz(uID, i + 1, arr) != 0:
+            ok[i] = False
+            continue
+        cols[:, i] = arr
+    ids = np.arange(1, N + 1)
+    return ids[ok], cols[:, ok].T                # vista (N,3) Fortran-order, nessuna copia extra
 
 
 # ------------------------- ricerca nodi di interesse -------------------------
 
-def find_node(model_path: str, span: float, h_story: float, offset: float, tol: float = 1e-6) -> dict:
+# Memo di find_node: {(path, mtime_ns, size, span, h_story, offset, tol): risultato}.
+# mtime/size nella chiave → un .st7 riscritto invalida da sé le voci vecchie.
+_FIND_NODE_CACHE: dict[tuple, dict] = {}
+
+def find_node(model_path: str, span: float, h_story: float, offset: float, tol: float = 1e-6,
+              uID: int | None = None) -> dict:
     """
     Trova il nodo trave-pilastro destro del primo solaio:
       - condizione: X≈span e Y≈h_story, tie-break su X massimo
     Trova poi i 3 nodi più vicini a distanza≈offset.
     Ritorna: {"ref_node": {"id", "xyz"}, "neighbors": [{"id","dist","xyz"}×3]}.
+    Chiamate ripetute sullo stesso file non modificato non riaprono il modello.
+    uID: sessione già aperta su model_path (vedi straus7_open); None = apre e chiude da sé.
     """
-    _ck(st7.St7Init(), "St7Init")
-    try:
-        _open(1, model_path)
-        try:
-            N = _total_nodes(1)
-            nodes: list[tuple[int, float, float, float]] = []
-            for n in range(1, N + 1):
-                try:
-                    x, y, z = _xyz(1, n)
-                    nodes.append((n, x, y, z))
-                except RuntimeError:
-                    continue
-
-            cands = [t for t in nodes if abs(t[1] - span) <= tol and abs(t[2] - h_story) <= tol]
-            if not cands:
-                raise ValueError(f"Nessun nodo con X≈{span} e Y≈{h_story}. Aumenta tol.")
-
-            ref_id, xr, yr, zr = max(cands, key=lambda t: t[1])
-            pr = (xr, yr, zr)
-            win = max(tol, offset * 1e-3)
-            neigh: list[tuple[float, int, tuple[float, float, float]]] = []
-            for n, x, y, z in nodes:
-                if n == ref_id:
-                    continue
-                d = _dist3(pr, (x, y, z))
-                if abs(d - offset) <= win:
-                    neigh.append((d, n, (x, y, z)))
-
-            if len(neigh) < 3:
-                ordered = sorted(
-                    (( _dist3(pr, (x, y, z)), n, (x, y, z)) for n, x, y, z in nodes if n != ref_id),
-                    key=lambda t: t[0]
-                )
-                seen = {n for _, n, _ in neigh}
-                for d, n, p in ordered:
-                    if n not in seen:
-                        neigh.append((d, n, p))
-                    if len(neigh) >= 3:
-                        break
-
-            neigh.sort(key=lambda t: t[0])
-            sel = neigh[:3]
-
-            print(f"Rif: Node {ref_id}  XYZ=({xr:.6g}, {yr:.6g}, {zr:.6g})")
-            for i, (d, n, p) in enumerate(sel, 1):
-                print(f"{i}: Node {n}  d={d:.6g}  XYZ=({p[0]:.6g},{p[1]:.6g},{p[2]:.6g})")
-
-            return {
-                "ref_node": {"id": ref_id, "xyz": (xr, yr, zr)},
-                "neighbors": [{"id": n, "dist": d, "xyz": p} for d, n, p in sel],
-            }
-        finally:
-            _close(1)
-    finally:
-        _ck(st7.St7Release(), "St7Release")
+    path = os.path.abspath(model_path)
+    st_ = os.stat(path)
+    key = (path, st_.st_mtime_ns, st_.st_size, span, h_story, offset, tol)
+    res = _FIND_NODE_CACHE.get(key)
+    if res is None:
+        if uID is None:                                  # sessione propria
+            with straus7_open(model_path) as own:
+                res = _find_node(own, span, h_story, offset, tol)
+        else:                                            # modello già aperto dal chiamante
+            res = _find_node(uID, span, h_story, offset, tol)
+        _FIND_NODE_CACHE[key] = res
+
+    (xr, yr, zr) = res["ref_node"]["xyz"]
+    print(f"Rif: Node {res['ref_node']['id']}  XYZ=({xr:.6g}, {yr:.6g}, {zr:.6g})")
+    for i, nb in enumerate(res["neighbors"], 1):
+        p = nb["xyz"]
+        print(f"{i}: Node {nb['id']}  d={nb['dist']:.6g}  XYZ=({p[0]:.6g},{p[1]:.6g},{p[2]:.6g})")
+
+    return copy.deepcopy(res)                            # il chiamante può modificarlo
+
+def _find_node(uID: int, span: float, h_story: float, offset: float, tol: float) -> dict:
+    """Ricerca effettiva di find_node sul modello già aperto su 'uID'."""
+    N = _total_nodes(uID)
+    ids, xyz = _all_xyz(uID, N)                    # nodi non leggibili già esclusi
+
+    # candidati X≈span e Y≈h_story (maschere su colonne contigue)
+    mask = (np.abs(xyz[:, 0] - span) <= tol) & (np.abs(xyz[:, 1] - h_story) <= tol)
+    cand = np.flatnonzero(mask)
+    if cand.size == 0:
+        raise ValueError(f"Nessun nodo con X≈{span} e Y≈{h_story}. Aumenta tol.")
+
+    r = cand[np.argmax(xyz[cand, 0])]            # tie-break: X massimo, primo a pari merito
+    ref_id = int(ids[r])
+    xr, yr, zr = xyz[r].tolist()
+    win = max(tol, offset * 1e-3)
+
+    # distanze al quadrato di tutti i nodi dal riferimento in un colpo solo:
+    # |d-offset| <= win  ⇔  lo² <= d² <= hi², la radice serve solo per i 3 scelti
+    d2 = ((xyz - xyz[r]) ** 2).sum(axis=1)
+    lo2 = max(offset - win, 0.0) ** 2
+    hi2 = (offset + win) ** 2
+    others = ids != ref_id
+    in_win = others & (d2 >= lo2) & (d2 <= hi2)
+    near = np.flatnonzero(in_win)
+
+    if near.size < 3:                            # completa con i più vicini
+        k = 3 - near.size
+        pool = np.flatnonzero(others & ~in_win)
+        if pool.size > k:                        # selezione O(N): solo i k più vicini
+            kth = np.partition(d2[pool], k - 1)[k - 1]
+            pool = pool[d2[pool] <= kth]         # (pari merito inclusi)
+        extra = pool[np.argsort(d2[pool], kind="stable")][:k]
+        near = np.concatenate((near, extra))
+
+    sel_idx = near[np.argsort(d2[near], kind="stable")][:3]
+    sel = [(float(np.sqrt(d2[i])), int(ids[i]), tuple(xyz[i].tolist())) for i in sel_idx]
+
+    return {
+        "ref_node": {"id": ref_id, "xyz": (xr, yr, zr)},
+        "neighbors": [{"id": n, "dist": d, "xyz": p} for d, n, p in sel],
+    }
 
 
 # ------------------------- utilità risultati LTD -------------------------
@@ -127,71 +182,93 @@ def _guess_lta_path(model_path: str) -> str:
 
 # ------------------------- export spostamenti nel tempo -------------------------
 
-def export_ltd_node_displacements(model_path: str, node_ids: list[int], out_dir: str) -> dict:
+# componenti esportate: (indice nel vettore rtNodeDisp a 6 valori, etichetta file)
+_COMPS = ((0, "DX"), (1, "DY"), (5, "RZ"))
+
+def export_ltd_node_displacements(model_path: str, node_ids: list[int], out_dir: str,
+                                  uID: int | None = None) -> dict:
     """
     Estrae DX, DY, RZ nel tempo dai risultati LTD e salva 3 file TXT per nodo.
     Parametri:
       - model_path: percorso del .st7
       - node_ids: lista di ID nodi
       - out_dir: cartella di output per i TXT
+      - uID: sessione già aperta su model_path (vedi straus7_open); None = apre e chiude da sé
     Ritorna: {node_id: {"DX": path, "DY": path, "RZ": path}}
     """
     os.makedirs(out_dir, exist_ok=True)
     resfile = _guess_lta_path(model_path)
+    if uID is None:
+        with straus7_open(model_path) as own:
+            return _export_node_disp(own, resfile, node_ids, out_dir)
+    return _export_node_disp(uID, resfile, node_ids, out_dir)
 
-    uID = 1
-    _ck(st7.St7Init(), "Init")
+def _export_node_disp(uID: int, resfile: str, node_ids: list[int], out_dir: str) -> dict:
+    """Corpo di export_ltd_node_displacements sul modello già aperto su 'uID'."""
     created: dict[int, dict[str, str]] = {}
-    try:
-        _ck(st7.St7OpenFile(uID, model_path.encode("utf-8"), b""), "Open .st7")
-        try:
-            numP = C.c_long()
-            numS = C.c_long()
-            _ck(
-                st7.St7OpenResultFile(
-                    uID,
-                    resfile.encode("utf-8"),
-                    b"",
-                    st7.kNoCombinations,
-                    C.byref(numP),
-                    C.byref(numS)
-                ),
-                "Open .lta"
-            )
-            ncases = int(numP.value)
-            
-            # --- QUESTA PARTE È CORRETTA ---
-            # Prepara i file di output per ogni nodo e per DX/DY/RZ
-            fhandles: dict[tuple[int, int], any] = {}
-            for nid in node_ids:
-                created[nid] = {}
-                # Componenti corrette: 0=DX, 1=DY, 5=RZ
-                for comp, label in [(0, "DX"), (1, "DY"), (5, "RZ")]:
-                    fp = os.path.join(out_dir, f"node{nid}_{label}.txt")
-                    fh = open(fp, "w", encoding="utf-8")
-                    fh.write("t\tvalue\n")
-                    fhandles[(nid, comp)] = fh
-                    created[nid][label] = fp
-            # --------------------------------
-
-            vec6 = (C.c_double * 6)()
-            tval = C.c_double()
-
-            for case in range(1, ncases + 1):
-                _ck(st7.St7GetResultCaseTime(uID, case, C.byref(tval)), "Get time")
-                t = tval.value
-                for nid in node_ids:
-                    _ck(st7.St7GetNodeResult(uID, st7.rtNodeDisp, nid, case, vec6), f"Get node disp {nid}")
-                    # Scrive DX/DY/RZ
-                    for comp in (0, 1, 5):
-                        fhandles[(nid, comp)].write(f"{t}\t{vec6[comp]}\n")
-
-            for fh in fhandles.values():
-                fh.close()
-
-            _ck(st7.St7CloseResultFile(uID), "Close results")
-            return created
-        finally:
-            _ck(st7.St7CloseFile(uID), "Close .st7")
-    finally:
-        _ck(st7.St7Release(), "Release")
+    numP = C.c_long()
+    numS = C.c_long()
+    _ck(
+        st7.St7OpenResultFile(
+            uID,
+            resfile.encode("utf-8"),
+            b"",
+            st7.kNoCombinations,
+            C.byref(numP),
+            C.byref(numS)
+        ),
+        "Open .lta"
+    )
+    ncases = int(numP.value)
+
+    tval = C.c_double()
+    p_tval = C.byref(tval)                           # byref creato una volta sola
+
+    # funzioni/costanti API in locali: niente LOAD_GLOBAL + LOAD_ATTR nei loop
+    get_time = st7.St7GetResultCaseTime
+    get_res = st7.St7GetNodeResult
+    rt_disp = st7.rtNodeDisp
+
+    # 1) tempi di tutti i case in un solo passaggio
+    times = np.empty(ncases, dtype=np.float64)
+    for case in range(1, ncases + 1):
+        err = get_time(uID, case, p_tval)
+        if err:
+            _ck(err, "Get time")
+        times[case - 1] = tval.value
+
+    # 2) nodo esterno, case interno: serie temporale completa per nodo.
+    #    Ogni riga di 'disp' è esposta come double[6] ctypes sulla stessa memoria:
+    #    l'API scrive direttamente nell'array NumPy, senza buffer intermedio né copia.
+    disp = np.empty((len(node_ids), ncases, 6), dtype=np.float64)
+    row_t = C.c_double * 6 * ncases
+    for i, nid in enumerate(node_ids):
+        for case, row in enumerate(row_t.from_buffer(disp[i]), 1):
+            err = get_res(uID, rt_disp, nid, case, row)
+            if err:                                  # messaggio formattato solo in caso di errore
+                _ck(err, f"Get node disp {nid}")
+
+    _ck(st7.St7CloseResultFile(uID), "Close results")   # da qui in poi solo I/O su disco
+
+    # 3) un file per nodo e per componente: job piatti, indice i*len(_COMPS)+j
+    jobs = []
+    for i, nid in enumerate(node_ids):
+        paths = created[nid] = {}
+        series = disp[i]
+        for comp, label in _COMPS:
+            fp = os.path.join(out_dir, f"node{nid}_{label}.txt")
+            jobs.append((fp, series[:, comp]))
+            paths[label] = fp
+
+    # file indipendenti tra loro: scritture sovrapposte su più thread
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs)) or 1) as pool:
+        list(pool.map(lambda job: _write_series(job[0], times, job[1]), jobs))
+    return created
+
+def _write_series(fp: str, times: np.ndarray, values: np.ndarray) -> None:
+    """Scrive un file TXT 't<TAB>value' con intestazione."""
+    # buffer da 1 MiB: savetxt scrive una riga per volta, il file va su disco a blocchi
+    with open(fp, "w", encoding="utf-8", buffering=1 << 20) as fh:
+        # "%s" = repr più corta del float, come la vecchia scrittura riga per riga
+        np.savetxt(fh, np.column_stack((times, values)), fmt="%s",
+                   delimiter="\t", header="t\tvalue", comments="")
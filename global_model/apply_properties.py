@@ -5,6 +5,7 @@
 #
 # NOTE API (da manuale):
 #   St7SetLibraryPath(char* LibraryPath)
+#   St7GetLibraryPath(char* LibraryPath, long MaxStringLen)
 #   St7GetNumLibraries(long LibraryType, long* NumLibraries)
 #   St7GetLibraryName(long LibraryType, long LibraryID, char* LibraryName, long MaxStringLen)
 #   St7GetNumLibraryItems(long LibraryType, long LibraryID, long* NumItems)
@@ -21,6 +22,7 @@
 
 import os
 import ctypes as ct
+from functools import lru_cache
 
 # Rende visibile la DLL Straus7 (Python 3.8+)
 os.add_dll_directory(r"C:\Program Files\Straus7 R31\Bin64")
@@ -45,37 +47,44 @@ def _decode(b: bytes) -> str:
             return b.decode("latin-1", errors="ignore")
 
 # normalizza stringa: rimuove spazi, trattini e riferimenti “BS/EN/BSL”, case-insensitive
+_NORM_DROP = str.maketrans('', '', '- ')     # spazi e trattini tolti in un solo passaggio
+_NORM_REFS = ('bs', 'en', 'bsl')             # rimossi in quest'ordine (ogni replace vede il risultato del precedente)
+
 def _norm(s: str) -> str:
-    t = s.lower().replace('-', '').replace(' ', '')
-    for k in ('bs', 'en', 'bsl'):
+    t = s.lower().translate(_NORM_DROP)
+    for k in _NORM_REFS:
         t = t.replace(k, '')
     # uniforma “hea” e “he” per tollerare varianti
     t = t.replace('hea', 'he')
     return t
 
 # ---------------- ricerca sezioni .BSL (permissiva) ---------------------------
-def _find_item_in_beam_section_lib(item_name: str):
-    """
-    Cerca una sezione BEAM nelle librerie .BSL caricate (lbBeamSection).
-    Accetta abbreviazioni/varianti: match per SOTTOSTRINGA su stringhe normalizzate.
-    Ritorna (LibraryID, ItemID). Se non trova, alza errore con suggerimenti.
-    """
-    target = _norm(item_name)
+# Indice delle voci .BSL per percorso librerie (St7GetLibraryPath), costruito una volta:
+#   path -> (esatti {norm: (LibraryID, ItemID)}, voci [(LibraryID, ItemID, norm, raw)] in ordine)
+_SECTION_INDEX: dict[str, tuple[dict[str, tuple[int, int]], list[tuple[int, int, str, str]]]] = {}
+
+def _library_key() -> str:
+    """Percorso librerie attualmente impostato (St7SetLibraryPath)."""
+    path_buf = ct.create_string_buffer(512)
+    check(St7GetLibraryPath(path_buf, ct.sizeof(path_buf)))
+    return _decode(path_buf.value)
+
+def _section_index(key: str):
+    """Ritorna l'indice delle sezioni BEAM per il percorso librerie 'key' (lo crea al primo uso)."""
+    index = _SECTION_INDEX.get(key)
+    if index is not None:
+        return index
+
+    exact: dict[str, tuple[int, int]] = {}
+    items: list[tuple[int, int, str, str]] = []
 
     nlib = ct.c_long()
     check(St7GetNumLibraries(lbBeamSection, ct.byref(nlib)))
 
-    lib_name_buf = ct.create_string_buffer(512)
     item_name_buf = ct.create_string_buffer(512)
-    suggestions = []
-
+    nitems = ct.c_long()
     for lib_id in range(1, nlib.value + 1):
-        # nome libreria disponibile (informativo; usa decode tollerante)
-        check(St7GetLibraryName(lbBeamSection, lib_id, lib_name_buf, ct.sizeof(lib_name_buf)))
-        _ = _decode(lib_name_buf.value)
-
-        # numero di voci nella libreria corrente
-        nitems = ct.c_long()
+        # numero di voci nella libreria corrente (il nome libreria non serve)
         check(St7GetNumLibraryItems(lbBeamSection, lib_id, ct.byref(nitems)))
 
         for item_id in range(1, nitems.value + 1):
@@ -86,31 +95,64 @@ def _find_item_in_beam_section_lib(item_name: str):
             )
             raw = _decode(item_name_buf.value)
             norm = _norm(raw)
+            exact.setdefault(norm, (lib_id, item_id))     # a parità di nome vince la prima voce
+            items.append((lib_id, item_id, norm, raw))
+
+    index = _SECTION_INDEX[key] = (exact, items)
+    return index
 
-            # match per sottostringa in entrambe le direzioni
-            if target in norm or norm in target:
-                return lib_id, item_id
+def _find_item_in_beam_section_lib(item_name: str):
+    """
+    Cerca una sezione BEAM nelle librerie .BSL caricate (lbBeamSection).
+    Prima il nome normalizzato esatto, poi match per SOTTOSTRINGA (abbreviazioni/varianti).
+    Ritorna (LibraryID, ItemID). Se non trova, alza errore con suggerimenti.
+    """
+    return _lookup_section(_library_key(), item_name)
+
+# memo per (percorso librerie, nome): cambiare percorso cambia chiave, niente da invalidare
+@lru_cache(maxsize=256)
+def _lookup_section(lib_key: str, item_name: str):
+    """Corpo di _find_item_in_beam_section_lib per il percorso librerie 'lib_key'."""
+    target = _norm(item_name)
+    exact, items = _section_index(lib_key)
 
-            # raccogli qualche esempio utile
-            up = raw.upper()
-            if any(k in up for k in ("HE", "HEA", "IPE")) and len(suggestions) < 24:
-                suggestions.append(raw)
+    hit = exact.get(target)
+    if hit is not None:
+        return hit
+
+    suggestions = []
+    for lib_id, item_id, norm, raw in items:
+        # match per sottostringa in entrambe le direzioni
+        if target in norm or norm in target:
+            return lib_id, item_id
+
+        # raccogli qualche esempio utile
+        up = raw.upper()
+        if any(k in up for k in ("HE", "HEA", "IPE")) and len(suggestions) < 24:
+            suggestions.append(raw)
 
     hint = f" | Esempi: {', '.join(sorted(set(suggestions))[:12])}" if suggestions else ""
     raise RuntimeError(f"Sezione '{item_name}' non trovata nelle librerie .BSL{hint}")
 
 
 # ---------------- materiale proprietà BEAM -----------------------------------
-def _set_beam_material(uID: int, prop: int, E: float, nu: float, rho: float):
+_MAT_BUF = (ct.c_double * 9)()     # vettore materiale BEAM, riempito una volta per apply_properties
+
+def _beam_material(E: float, nu: float, rho: float):
     """
-    Imposta E, ν, ρ per una proprietà BEAM. G calcolato automaticamente da ν.
+    Prepara in _MAT_BUF il vettore materiale con E, ν, ρ (altre voci a zero).
     Indici usati: ipBeamModulus, ipBeamPoisson, ipBeamDensity (wrapper St7API.py).
     """
-    check(St7SetBeamShearModulusMode(uID, prop, smUsePoissonsRatio))  # usa ν per G
-    mat = (ct.c_double * 9)()
+    mat = _MAT_BUF
+    ct.memset(mat, 0, ct.sizeof(mat))
     mat[ipBeamModulus] = E
     mat[ipBeamPoisson] = nu
     mat[ipBeamDensity] = rho
+    return mat
+
+def _set_beam_material(uID: int, prop: int, mat):
+    """Assegna il vettore materiale 'mat' a una proprietà BEAM. G calcolato automaticamente da ν."""
+    check(St7SetBeamShearModulusMode(uID, prop, smUsePoissonsRatio))  # usa ν per G
     check(St7SetBeamMaterialData(uID, prop, mat))
 
 # ---------------- API principale ---------------------------------------------
@@ -160,9 +202,10 @@ def apply_properties(
     check(St7NewBeamProperty(uID, prop_col,  btBeam, _b("Columns")))
     check(St7NewBeamProperty(uID, prop_beam, btBeam, _b("Beams")))
 
-    # materiale su entrambe le proprietà
-    _set_beam_material(uID, prop_col,  E, nu, rho)
-    _set_beam_material(uID, prop_beam, E, nu, rho)
+    # materiale su entrambe le proprietà (stesso vettore, preparato una volta)
+    mat = _beam_material(E, nu, rho)
+    _set_beam_material(uID, prop_col,  mat)
+    _set_beam_material(uID, prop_beam, mat)
 
     # flags per import sezione: [ImportMaterial=0, CalcNulls=1, ImportDamping=0, ReplaceName=1]
     flags = (ct.c_long * 4)(0, 1, 0, 1)
@@ -20,17 +20,9 @@ def check(rc):
             msg = f"code {rc}"
         raise RuntimeError(f"St7 error: {msg}")
 
-def _set_node_restraint(uID, case_num, nid, flags6):
-    dof = c_long_arr(6); vals = c_dbl_arr(6)
-    for i, v in enumerate(flags6): dof[i] = int(v); vals[i] = 0.0
-    # Prova (uID, case, node, ...) e poi (uID, node, case, ...)
-    rc = St7SetNodeRestraint6(uID, case_num, nid, 1, dof, vals)
-    if rc == 0:
-        return
-    rc = St7SetNodeRestraint6(uID, nid, case_num, 1, dof, vals)
-    check(rc)
-
 # ------------- core -------------
+_DEFAULTS_XY = (0, 0, 1, 1, 1, 0)    # 2D Beam XY: DX, DY, RZ liberi
+
 def apply_freedom_case(model_path: str,
                        base_nodes: list[int],
                        case_num: int = 1,
@@ -56,25 +48,30 @@ def apply_freedom_case(model_path: str,
     try: check(St7SetWindowFreedomCase(uID, case_num))
     except Exception: pass
 
-    # Defaults del case = 2D Beam XY: [0,0,1,1,1,0]
-    defaults = c_long_arr(6)
-    for i, v in enumerate((0, 0, 1, 1, 1, 0)): defaults[i] = v
+    # Defaults del case = 2D Beam XY: [0,0,1,1,1,0] (array riempito in blocco dal costruttore)
+    defaults = (ct.c_long * 6)(*_DEFAULTS_XY)
     check(St7SetFreedomCaseDefaults(uID, case_num, defaults))
 
-    # Verifica
+    # Verifica (lettura in blocco via slice, niente indicizzazione per elemento)
     chk = c_long_arr(6); check(St7GetFreedomCaseDefaults(uID, case_num, chk))
-    if tuple(int(chk[i]) for i in range(6)) != (0, 0, 1, 1, 1, 0):
+    if tuple(chk[:]) != _DEFAULTS_XY:
         raise RuntimeError("Defaults non impostati correttamente.")
 
     # Solo nodi di base: union(default, extra[Tx,Ty,Rz]) = incastro completo
-    full_fix = (1, 1, 1, 1, 1, 1)
+    # stessi vettori per tutti i nodi: costruiti una volta fuori dal loop
+    dof = (ct.c_long * 6)(1, 1, 1, 1, 1, 1)
+    vals = c_dbl_arr(6)                              # spostamenti imposti = 0
+    set_restraint = St7SetNodeRestraint6
     for nid in base_nodes:
-        _set_node_restraint(uID, case_num, nid, full_fix)
+        # firma: (uID, NodeNum, CaseNum, UCSId, long* Status, double* Doubles)
+        rc = set_restraint(uID, nid, case_num, 1, dof, vals)
+        if rc != 0:
+            check(rc)
 
     check(St7SaveFile(uID)); check(St7CloseFile(uID))
     return {
         "model_path": p,
         "freedom_case_num": case_num,
-        "defaults": (0, 0, 1, 1, 1, 0),
+        "defaults": _DEFAULTS_XY,
         "base_nodes": list(base_nodes),
     }
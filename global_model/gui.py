@@ -1,6 +1,7 @@
 # gui.py  (carichi input in kN/m²)
 
-import os, ctypes as ct, tkinter as tk
+import os, re, ctypes as ct, tkinter as tk
+from itertools import islice
 from tkinter import ttk, messagebox
 
 # Caricamento opzionale di Pillow (per scalare immagini con qualità migliore)
@@ -20,36 +21,59 @@ def _b(s:str)->bytes:
     return s.encode("utf-8")
 
 # Gestione errori API St7
+_ERR_BUF=(ct.c_char*256)()   # testo errore, usato solo quando una chiamata fallisce
+
+def _raise(rc:int):
+    """Percorso lento di _check: legge il testo dell'errore St7 e solleva."""
+    buf=_ERR_BUF
+    try:
+        St7GetAPIErrorString(rc,buf,256)
+        msg=buf.value.decode("utf-8","ignore")
+    except Exception:
+        msg=""
+    raise RuntimeError(f"St7 error {rc}: {msg}")
+
 def _check(rc:int):
     """Alza un'eccezione Python con il testo dell'errore St7 se rc != 0."""
     if rc!=0:
-        buf=(ct.c_char*256)()
-        try:
-            St7GetAPIErrorString(rc,buf,256)
-            msg=buf.value.decode("utf-8","ignore")
-        except Exception:
-            msg=""
-        raise RuntimeError(f"St7 error {rc}: {msg}")
+        _raise(rc)
 
 # Lettura di tutte le sezioni trave "British" presenti nella libreria di Straus7
-def _load_all_beam_sections_british(library_root:str)->list[str]:
-    """Legge le sezioni trave dalla libreria di Straus7 e filtra quelle 'BS EN'."""
+def _iter_beam_sections_british(library_root:str):
+    """Scorre le voci della libreria sezioni trave di Straus7, una per passo:
+    produce il nome se è una sezione 'BS EN', altrimenti None (serve a leggere a fette)."""
     _check(St7Init())
     _check(St7SetLibraryPath(_b(os.path.abspath(library_root))))
     nlib=ct.c_long()
     _check(St7GetNumLibraries(lbBeamSection, ct.byref(nlib)))
     item_buf=ct.create_string_buffer(512)
-    out=[]
+    nbuf=ct.sizeof(item_buf)
+    get_name=St7GetLibraryItemName   # lookup locale nel ciclo per-item
     for lib_id in range(1, nlib.value+1):
         nitems=ct.c_long()
         _check(St7GetNumLibraryItems(lbBeamSection, lib_id, ct.byref(nitems)))
         for item_id in range(1, nitems.value+1):
-            _check(St7GetLibraryItemName(lbBeamSection, lib_id, item_id, item_buf, ct.sizeof(item_buf)))
-            s=item_buf.value.decode("utf-8", errors="ignore")
-            su=s.upper()
-            if "BS EN" in su or su.startswith("BS EN -"):
-                out.append(s)
-    return sorted(set(out))
+            rc=get_name(lbBeamSection, lib_id, item_id, item_buf, nbuf)
+            if rc:
+                _raise(rc)
+            raw=item_buf.value
+            if b"BS EN" in raw.upper():   # filtro sui bytes: decodifica solo le sezioni tenute
+                yield raw.decode("utf-8", errors="ignore")
+            else:
+                yield None
+
+def _load_all_beam_sections_british(library_root:str)->list[str]:
+    """Legge le sezioni trave dalla libreria di Straus7 e filtra quelle 'BS EN'."""
+    return sorted({s for s in _iter_beam_sections_british(library_root) if s})
+
+# Elenco ridotto usato se la libreria Straus7 non è leggibile
+_FALLBACK_SECTIONS=[
+    "BS EN - HE 160 A - BS EN 10365-2017 BSL",
+    "BS EN - HE 180 A - BS EN 10365-2017 BSL",
+    "BS EN - IPE 240 - BS EN 10365-2017 BSL",
+    "BS EN - IPE 270 - BS EN 10365-2017 BSL",
+]
+_LOADING="Caricamento..."
 
 # Dizionario di famiglie per filtrare le sezioni
 FAMILY_FILTERS={
@@ -59,42 +83,51 @@ FAMILY_FILTERS={
     "L (angolari)":[" EQUAL ANGLES "," ANGLE "," L "],
     "Tutte (British)":[]
 }
-
-def _filter_by_family(items, family):
-    """Ritorna solo le sezioni compatibili con la famiglia scelta; se vuoto, ritorna l'intera lista."""
-    toks=FAMILY_FILTERS.get(family, [])
-    if not toks:
+# Un'unica regex per famiglia (alternanza dei token): una sola scansione per stringa
+FAMILY_REGEX={fam: re.compile("|".join(re.escape(t) for t in toks)) for fam,toks in FAMILY_FILTERS.items() if toks}
+
+def _filter_by_family(items, family, items_up=None):
+    """Ritorna solo le sezioni compatibili con la famiglia scelta; se vuoto, ritorna l'intera lista.
+    items_up: eventuale lista parallela già in maiuscolo (evita di ricalcolarla)."""
+    pat=FAMILY_REGEX.get(family)
+    if pat is None:
         return items
-    up=[(s,s.upper()) for s in items]
-    res=[s for s,u in up if any(tok in u for tok in toks)]
+    if items_up is None:
+        items_up=[s.upper() for s in items]
+    search=pat.search
+    res=[s for s,u in zip(items, items_up) if search(u)]
     return res or items
 
+def _family_index(items)->dict:
+    """Precalcola {famiglia: sezioni filtrate} per tutte le famiglie (maiuscolo calcolato una volta)."""
+    items_up=[s.upper() for s in items]
+    return {fam: _filter_by_family(items, fam, items_up) for fam in FAMILY_FILTERS}
+
 
 def run_gui(image_path: str = r"C:/Users/demnic15950/Downloads/FEM_model/utils/geometry_scheme.png") -> dict | None:
     """
     Crea e mostra la GUI per l’input dei dati.
     Ritorna un dict con i valori inseriti se l’utente preme OK, altrimenti None.
     """
-    # Carica l'elenco completo di sezioni da Straus7; se fallisce usa un fallback ridotto
-    try:
-        ALL = _load_all_beam_sections_british(r"C:\ProgramData\Straus7 R31\Data")
-    except Exception:
-        ALL = [
-            "BS EN - HE 160 A - BS EN 10365-2017 BSL",
-            "BS EN - HE 180 A - BS EN 10365-2017 BSL",
-            "BS EN - IPE 240 - BS EN 10365-2017 BSL",
-            "BS EN - IPE 270 - BS EN 10365-2017 BSL",
-        ]
+    # Elenco sezioni: letto da Straus7 a fette dal loop Tk (root.after) mentre la finestra è già
+    # visibile. Tutte le chiamate St7 restano sul thread principale (thread safety non documentata).
+    # lib["all"]/lib["fam"] restano None finché il caricamento non termina.
+    lib={"all": None, "fam": None}
+    _LOAD_SLICE=256                      # voci di libreria lette per ogni passo del loop Tk
 
     # Funzione interna: aggiorna la combobox "sezione" in base alla combobox "famiglia"
-    # Nota: definita QUI dentro così può usare direttamente la variabile ALL
+    # Nota: definita QUI dentro così può usare direttamente lib
     def _update_cb_sections(cb_family: ttk.Combobox, cb_section: ttk.Combobox):
         """
-        Legge la famiglia selezionata, filtra ALL con _filter_by_family
+        Legge la famiglia selezionata, prende le sezioni già filtrate da lib["fam"]
         e popola la combobox delle sezioni con il primo valore selezionato.
         """
+        if lib["all"] is None:
+            cb_section.configure(values=(_LOADING,))
+            cb_section.set(_LOADING)
+            return
         fam = cb_family.get()
-        vals = _filter_by_family(ALL, fam)
+        vals = lib["fam"].get(fam, lib["all"])
         cb_section.configure(values=vals)
         if vals:
             cb_section.current(0)
@@ -201,9 +234,32 @@ def run_gui(image_path: str = r"C:/Users/demnic15950/Downloads/FEM_model/utils/g
     cb_he_fam.bind("<<ComboboxSelected>>", lambda e: _update_cb_sections(cb_he_fam, cb_he))
     cb_ipe_fam.bind("<<ComboboxSelected>>", lambda e: _update_cb_sections(cb_ipe_fam, cb_ipe))
 
-    # Popolamento iniziale delle combobox sezione coerenti con le famiglie preimpostate
+    # Popolamento iniziale ("Caricamento...") e avvio lettura libreria a fette
     _update_cb_sections(cb_he_fam, cb_he)
     _update_cb_sections(cb_ipe_fam, cb_ipe)
+    sections=_iter_beam_sections_british(r"C:\ProgramData\Straus7 R31\Data")
+    found=set()
+
+    def _load_library_step():
+        """Legge fino a _LOAD_SLICE voci e ripianifica; a fine lettura (o errore) popola le combobox."""
+        n=0
+        try:
+            for s in islice(sections, _LOAD_SLICE):
+                n+=1
+                if s:
+                    found.add(s)
+        except Exception:
+            all_s=list(_FALLBACK_SECTIONS)           # libreria non leggibile: fallback ridotto
+        else:
+            if n==_LOAD_SLICE:
+                root.after(1, _load_library_step)   # restituisce il controllo agli eventi Tk
+                return
+            all_s=sorted(found)
+        lib["fam"]=_family_index(all_s)   # ALL non cambia durante la sessione GUI
+        lib["all"]=all_s
+        _update_cb_sections(cb_he_fam, cb_he)
+        _update_cb_sections(cb_ipe_fam, cb_ipe)
+    root.after(100, _load_library_step)
 
     # --- Carichi superficiali (in kN/m²) ---
     fl = ttk.LabelFrame(left, text="Carichi distribuiti [kN/m²]")
@@ -233,6 +289,9 @@ def run_gui(image_path: str = r"C:/Users/demnic15950/Downloads/FEM_model/utils/g
 
     def on_ok():
         """Valida e raccoglie i dati dalla GUI nel dict 'res', poi chiude."""
+        if lib["all"] is None:
+            messagebox.showinfo("Attendere", "Caricamento libreria sezioni in corso.")
+            return
         try:
             res.update({
                 "h_story": float(e_h.get()), "span": float(e_L.get()),
@@ -275,19 +334,35 @@ def run_gui(image_path: str = r"C:/Users/demnic15950/Downloads/FEM_model/utils/g
 
     # Label centrata per l'immagine
     img_label = tk.Label(frame_img, bg="white")
+    img_label._img = None
     img_label.place(relx=0.5, rely=0.5, anchor="center")
 
     # Dimensioni massime SOLO per l'immagine
     MAX_W, MAX_H = 800, 600
 
+    # Cache immagini: sorgente PIL decodificata una sola volta e immagine già adattata
+    # (il riquadro MAX_W x MAX_H è fisso, quindi il resize non richiede un nuovo ricampionamento)
+    _src_cache, _fit_cache = {}, {}
+
     def _load_and_fit(p):
         """Carica l'immagine dal percorso p e la adatta entro MAX_W x MAX_H."""
+        img = _fit_cache.get(p)
+        if img is not None:
+            if img_label._img is not img:
+                img_label._img = img
+                img_label.config(image=img, text="")
+            return
         if not os.path.exists(p):
             img_label.config(text=f"(Immagine non trovata)\n{p}", justify="center", bg="white", image="")
             return
 
         if _HAS_PIL:
-            im = Image.open(p)
+            src = _src_cache.get(p)
+            if src is None:
+                src = Image.open(p)
+                src.load()                 # decodifica subito e chiude il file
+                _src_cache[p] = src
+            im = src.copy()
             im.thumbnail((MAX_W, MAX_H), Image.LANCZOS)
             img = ImageTk.PhotoImage(im)
         else:
@@ -298,6 +373,7 @@ def run_gui(image_path: str = r"C:/Users/demnic15950/Downloads/FEM_model/utils/g
             img = tmp.subsample(max(fx, fy))
 
         # Evita il garbage collection mantenendo un riferimento
+        _fit_cache[p] = img
         img_label._img = img
         img_label.config(image=img, text="")
 
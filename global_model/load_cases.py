@@ -18,15 +18,21 @@ from St7API import *
 def _b(s: str) -> bytes:
     return s.encode("utf-8")
 
+_ERR_BUF = (ct.c_char * 256)()    # testo errore API, usato solo quando una chiamata fallisce
+
+def _raise(rc: int):
+    """Percorso lento di check: legge il testo dell'errore St7 e solleva."""
+    buf = _ERR_BUF
+    try:
+        St7GetAPIErrorString(rc, buf, 256)
+        msg = buf.value.decode("utf-8", errors="ignore")
+    except Exception:
+        msg = ""
+    raise RuntimeError(f"St7 error {rc}: {msg}")
+
 def check(rc: int):
     if rc != 0:
-        buf = (ct.c_char * 256)()
-        try:
-            St7GetAPIErrorString(rc, buf, 256)
-            msg = buf.value.decode("utf-8", errors="ignore")
-        except Exception:
-            msg = ""
-        raise RuntimeError(f"St7 error {rc}: {msg}")
+        _raise(rc)
 
 def c_dbl_arr(n):
     return (ct.c_double * n)()
@@ -36,58 +42,51 @@ def _get_total(uID: int, ent: int) -> int:
     check(St7GetTotal(uID, ent, ct.byref(n)))
     return n.value
 
-def _elem_nodes(uID: int, ety: int, eid: int) -> list[int]:
+def _elem_nodes(uID: int, ety: int, eid: int, conn=None) -> tuple[int, ...] | list[int]:
     # conn[0] = numero di nodi; segue la lista dei nodi
-    conn = (ct.c_long * (kMaxElementNode + 1))()
+    # conn: buffer (c_long * (kMaxElementNode+1)) riusabile fra chiamate; None = nuovo
+    if conn is None:
+        conn = (ct.c_long * (kMaxElementNode + 1))()
     check(St7GetElementConnection(uID, ety, eid, conn))
-    m = conn[0]
-    return [conn[i] for i in range(1, m + 1)]
-
-def _node_y(uID: int, nid: int) -> float:
-    a = c_dbl_arr(3)
-    check(St7GetNodeXYZ(uID, nid, a))
-    return float(a[1])  # coordinata Y
-
-def _elem_prop(uID: int, ety: int, eid: int) -> int:
-    p = ct.c_long()
-    check(St7GetElementProperty(uID, ety, eid, ct.byref(p)))
-    return p.value
+    if ety == tyBEAM:
+        return conn[1], conn[2]            # beam: sempre 2 nodi
+    return conn[1:conn[0] + 1]             # slice ctypes -> lista (copia in C)
 
 # ---------------- carico distribuito e NS mass su BEAM -----------------------
-def _apply_uniform_beam_load(uID: int, lc: int, eid: int, q_kNpm: float):
+# Vettori valori riusati da tutte le chiamate: si scrivono solo gli indici usati,
+# gli altri restano a zero dall'allocazione.
+_VALS6 = (ct.c_double * 6)()      # carico distribuito: [0]=estremo 1, [1]=estremo 2
+_VALS10 = (ct.c_double * 10)()    # NS mass: [0]=estremo 1, [1]=estremo 2, [6]=flag uniforme
+
+# Costanti API risolte una volta all'import (0 se la versione di St7API non le definisce)
+_DL_CONST = globals().get("dlConstant", 0)
+_PROJ_NONE = globals().get("bpNone", 0)
+
+def _apply_uniform_beam_load(uID: int, lc: int, eid: int, q_kNpm: float,
+                             _set=St7SetBeamDistributedForceGlobal6ID, _vals=_VALS6,
+                             _proj=_PROJ_NONE, _dl=_DL_CONST):
     """
     Applica un carico distribuito costante in direzione globale Y del beam.
     q_kNpm è il valore LINEARE [kN/m]. Il segno governa la direzione.
     """
-    try:
-        dl_const = dlConstant
-    except NameError:
-        dl_const = 0
-    try:
-        proj_none = bpNone
-    except NameError:
-        proj_none = 0
-
-    vals = c_dbl_arr(6)
-    vals[0] = q_kNpm  # valore all'estremo 1
-    vals[1] = q_kNpm  # valore all'estremo 2
+    _vals[0] = q_kNpm  # valore all'estremo 1
+    _vals[1] = q_kNpm  # valore all'estremo 2
     # BeamDir = 2 -> direzione globale Y
-    check(St7SetBeamDistributedForceGlobal6ID(uID, eid, 2, proj_none, lc, dl_const, 1, vals))
+    rc = _set(uID, eid, 2, _proj, lc, _dl, 1, _vals)
+    if rc:                     # check in linea: nessuna chiamata extra sul percorso di successo
+        _raise(rc)
 
-def _apply_uniform_beam_nsm(uID: int, lc: int, eid: int, mass_per_m: float):
+def _apply_uniform_beam_nsm(uID: int, lc: int, eid: int, mass_per_m: float,
+                            _set=St7SetBeamNSMass10ID, _vals=_VALS10, _dl=_DL_CONST):
     """
     Applica una non-structural mass uniforme [kg/m] al beam.
     """
-    try:
-        dl_const = dlConstant
-    except NameError:
-        dl_const = 0
-
-    vals = c_dbl_arr(10)
-    vals[0] = mass_per_m  # estremo 1
-    vals[1] = mass_per_m  # estremo 2
-    vals[6] = 1.0         # flag "uniform along length"
-    check(St7SetBeamNSMass10ID(uID, eid, lc, dl_const, 1, vals))
+    _vals[0] = mass_per_m  # estremo 1
+    _vals[1] = mass_per_m  # estremo 2
+    _vals[6] = 1.0         # flag "uniform along length"
+    rc = _set(uID, eid, lc, _dl, 1, _vals)
+    if rc:
+        _raise(rc)
 
 # ---------------------------- API principale ---------------------------------
 def apply_load_cases(
@@ -98,7 +97,8 @@ def apply_load_cases(
     q_Q: float | None = None,
     q_Q_roof: float | None = None,
     prop_beam: int = 2,
-    uID: int = 1
+    uID: int = 1,
+    opened: bool = False
 ) -> dict:
     """
     Apre il modello, crea i load cases G1/G2/Q e applica:
@@ -106,14 +106,17 @@ def apply_load_cases(
       - G2: carichi permanenti lineari + NS mass su TUTTE le travi con proprietà 'prop_beam'
       - Q : variabili su travi di piano e copertura + NS mass
     Blocca l'analisi se i carichi non provengono dalla GUI.
+    opened=True: il modello è già aperto su uID (es. straus7_open(..., save=True));
+    init/apertura e salvataggio/chiusura restano a carico del chiamante.
     """
     # --- verifica input ---
     if any(v is None for v in (q_G2, q_Q, q_Q_roof)):
         raise ValueError("Carichi non forniti dalla GUI. Analisi interrotta.")
 
     p = os.path.abspath(model_path)
-    check(St7Init())
-    check(St7OpenFile(uID, _b(p), b""))
+    if not opened:
+        check(St7Init())
+        check(St7OpenFile(uID, _b(p), b""))
 
     # ---- G1: usa il case #1 esistente e rinominalo --------------------------
     num = ct.c_long()
@@ -163,14 +166,28 @@ def apply_load_cases(
 
     # ---- individua travi e copertura ----------------------------------------
     # Seleziono i BEAM con proprietà = prop_beam.
+    # Non esistono getter in blocco: un solo passaggio con out-param allocati una volta,
+    # e la Y di ogni nodo letta una sola volta (i nodi sono condivisi fra travi contigue).
     n_beam = _get_total(uID, tyBEAM)
     beams, roof, ymax, yval_by_eid = [], [], None, {}
+    prop, conn, xyz = ct.c_long(), (ct.c_long * (kMaxElementNode + 1))(), c_dbl_arr(3)
+    p_prop = ct.byref(prop)
+    get_prop, get_xyz = St7GetElementProperty, St7GetNodeXYZ
+    y_of: dict[int, float] = {}
     for eid in range(1, n_beam + 1):
-        if _elem_prop(uID, tyBEAM, eid) != prop_beam:
+        rc = get_prop(uID, tyBEAM, eid, p_prop)
+        if rc:
+            _raise(rc)
+        if prop.value != prop_beam:
             continue
-        n1, n2 = _elem_nodes(uID, tyBEAM, eid)
-        y1, y2 = _node_y(uID, n1), _node_y(uID, n2)
-        ymean = 0.5 * (y1 + y2)
+        n1, n2 = _elem_nodes(uID, tyBEAM, eid, conn)
+        for nid in (n1, n2):
+            if nid not in y_of:
+                rc = get_xyz(uID, nid, xyz)
+                if rc:
+                    _raise(rc)
+                y_of[nid] = xyz[1]                       # coordinata Y
+        ymean = 0.5 * (y_of[n1] + y_of[n2])
         beams.append(eid)
         yval_by_eid[eid] = ymean
         ymax = ymean if ymax is None else max(ymax, ymean)
@@ -181,7 +198,8 @@ def apply_load_cases(
         for eid, ymean in yval_by_eid.items():
             if abs(ymean - ymax) < tol:
                 roof.append(eid)
-    floors = [e for e in beams if e not in roof]
+    roof_set = set(roof)                                 # appartenenza O(1)
+    floors = [e for e in beams if e not in roof_set]
 
     # ---- applica carichi -----------------------------------------------------
     # Converti kN/m in kg/m per NS mass: m' = |q|*1000/g
@@ -203,8 +221,9 @@ def apply_load_cases(
             _apply_uniform_beam_load(uID, lc_q, e, -abs(q_Q_roof))
             _apply_uniform_beam_nsm(uID, lc_q, e, mpm)
 
-    check(St7SaveFile(uID))
-    check(St7CloseFile(uID))
+    if not opened:
+        check(St7SaveFile(uID))
+        check(St7CloseFile(uID))
     return {
         "model_path": p,
         "load_cases": {"G1": lc_g1, "G2": lc_g2, "Q": lc_q},
@@ -48,10 +48,12 @@ def _clear_case(uID: int, case_num: int):
     _ck(st7.St7GetTotal(uID, st7.tyNODE, ct.byref(tot)), "GetTotal NODE")
     R0 = (ct.c_long * 6)(0, 0, 0, 0, 0, 0)         # nessun DOF vincolato
     U0 = (ct.c_double * 6)(0, 0, 0, 0, 0, 0)       # spostamenti imposti = 0
+    set_restraint = st7.St7SetNodeRestraint6
     for nid in range(1, tot.value + 1):
         # firma corretta: (uID, NodeNum, CaseNum, UCSId, long* Status, double* Doubles)
-        _ck(st7.St7SetNodeRestraint6(uID, nid, case_num, 1, R0, U0),
-            f"Clear node {nid} case {case_num}")
+        rc = set_restraint(uID, nid, case_num, 1, R0, U0)
+        if rc != 0:                                # messaggio formattato solo in caso di errore
+            _ck(rc, f"Clear node {nid} case {case_num}")
 
 def _try_delete_case(uID: int, case_num: int):
     """Prova a cancellare un case; se l'API non esiste, lo svuota e lo rinomina."""
@@ -158,7 +158,6 @@ def _invalidate_all_geometry_faces(uID: int) -> int:
     nfaces = _count(uID, st7.tyGEOMETRYFACE)
     if nfaces == 0:
         return 0
-    st7.St7InvalidateGeometryFace.argtypes = [ct.c_long, ct.c_long]
     for f in range(1, nfaces + 1):
         ck(st7.St7InvalidateGeometryFace(uID, f), f"InvalidateGeometryFace({f})")
     return nfaces
@@ -166,7 +165,6 @@ def _invalidate_all_geometry_faces(uID: int) -> int:
 def _purge_geometry_faces(uID: int) -> int:
     marked = _invalidate_all_geometry_faces(uID)
     if marked:
-        st7.St7DeleteInvalidGeometry.argtypes = [ct.c_long]
         ck(st7.St7DeleteInvalidGeometry(uID), "DeleteInvalidGeometry")
     left = _count(uID, st7.tyGEOMETRYFACE)
     print(f"[PurgeFaces] invalidated={marked} remaining={left}")
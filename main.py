@@ -12,7 +12,7 @@
 # - esegue l’analisi spettrale (solver SR, combinazione .SRA, solver statico)
 
 import sys
-import os, glob
+import os, glob, contextlib
 import ctypes as ct
 
 # Ensure the parent directory of 'analysis' is in the Python path
@@ -43,7 +43,7 @@ from analysis.spectral_analysis import run as spectral_run
 from analysis.beam_result import max_check_value
 from analysis.import_accelerogram import run
 from analysis.ltd_analysis import run_LTD, ck
-from analysis.node_disp_time import find_node, export_ltd_node_displacements
+from analysis.node_disp_time import find_node, export_ltd_node_displacements, straus7_open
 
 from local_model.create_file import create_st7_with_nodes
 from local_model.freedom_cases import create_unit_disp_freedom_cases
@@ -193,8 +193,7 @@ if __name__ == "__main__":
                 print(f"Mode {k:>2})    f  {f:.4f} Hz  |   T  {T:.4f} s")
 
             # Rayleigh F1=min, F2=max, display idem, R1=R2=5%
-            freqs = [f for _, f, _ in modes]
-            fmin, fmax = min(freqs), max(freqs)
+            fmin, fmax = float(modes["freq"].min()), float(modes["freq"].max())
 
             arr = (ct.c_double * 6)()
             arr[st7.ipRayleighF1]        = fmin
@@ -288,6 +287,13 @@ if __name__ == "__main__":
 
     # === Step 13: trova nodo trave-pilastro destro e 3 nodi offset ============
     print("\nRicerca nodi trave-pilastro destro...")
+    # Step 13 e 14 condividono una sola sessione API sul modello globale (Init/Open una volta)
+    api_session = contextlib.ExitStack()
+    try:
+        session_uID = api_session.enter_context(straus7_open(str(model)))
+    except Exception as e:
+        print("Errore apertura modello:", e)
+        session_uID = None                       # le funzioni apriranno una sessione propria
     try:
         # individua il nodo con X≈span e Y≈h_story e i tre nodi offset vicini
         nodes_info = find_node(
@@ -295,6 +301,7 @@ if __name__ == "__main__":
             span=gui_params["span"],
             h_story=gui_params["h_story"],
             offset=gui_params["offset"],
+            uID=session_uID,
         )
         ref_id = nodes_info["ref_node"]["id"]
         neigh_ids = [n["id"] for n in nodes_info["neighbors"]]
@@ -343,7 +350,8 @@ if __name__ == "__main__":
         paths_by_node = export_ltd_node_displacements(
             model_path=str(model),
             node_ids=node_ids,
-            out_dir=out_dir  # Ora passa il percorso corretto
+            out_dir=out_dir,  # Ora passa il percorso corretto
+            uID=session_uID,
         )
 
         print("\nSpostamenti nel tempo esportati (solo nodi offset):")
@@ -355,6 +363,8 @@ if __name__ == "__main__":
                 
     except Exception as e:
         print(f"Errore esportazione spostamenti: {e}")
+    finally:
+        api_session.close()                      # chiude il modello e rilascia l'API
 
     # === Step 15: apertura automatica del file Straus7 global model ==========================
     #print("\nApertura automatica del file Straus7...")